@@ -0,0 +1,171 @@
+"""
+JWT authentication helpers.
+
+Both the REST ``CachedJWTAuthentication`` class and the WebSocket
+``JWTAuthMiddleware`` resolve token users through a short-TTL cache, so a
+burst of requests or reconnects by the same users doesn't turn into one
+``User`` query each. ``ClaimsJWTAuthentication`` skips the lookup
+entirely for read-only endpoints.
+
+Cached users are dropped on User post_save/post_delete. Queryset
+``update()`` calls send no signals, so code that updates users in bulk
+must call ``invalidate_users`` itself; anything that doesn't is served
+stale for up to ``USER_CACHE_TTL`` seconds. Every
+``USER_CACHE_STATS_LOG_EVERY`` lookups the process logs its hit rate.
+"""
+import logging
+import threading
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL = 60
+
+
+class CacheStats:
+    """Process-local hit/miss counters for the user cache."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            total = self.hits + self.misses
+        log_every = getattr(settings, 'USER_CACHE_STATS_LOG_EVERY', 1000)
+        if log_every and total % log_every == 0:
+            stats = self.snapshot()
+            logger.info(
+                "%s cache: %d hits, %d misses, %.1f%% hit rate",
+                self.name, stats['hits'], stats['misses'], stats['hit_rate'] * 100,
+            )
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+user_cache_stats = CacheStats('JWT user')
+
+
+def user_cache_key(user_id):
+    return f"jwt_user:{user_id}"
+
+
+def _load_user(user_id):
+    user = User.objects.select_related('role').filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+    if user is not None:
+        cache.set(user_cache_key(user_id), user, USER_CACHE_TTL)
+    return user
+
+
+def get_cached_user(user_id):
+    """Return the user with this id, or None, going to the DB only on a cache miss."""
+    user = cache.get(user_cache_key(user_id))
+    user_cache_stats.record(hit=user is not None)
+    return user if user is not None else _load_user(user_id)
+
+
+async def aget_cached_user(user_id):
+    user = await cache.aget(user_cache_key(user_id))
+    user_cache_stats.record(hit=user is not None)
+    return user if user is not None else await database_sync_to_async(_load_user)(user_id)
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def invalidate_users(user_ids):
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through the user cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user built from the access token claims set by
+    CustomTokenObtainPairSerializer (username, email, user_role, is_staff,
+    is_admin). Attributes the token doesn't carry are read from the full
+    User, loaded lazily through the user cache.
+    """
+
+    @cached_property
+    def is_superuser(self):
+        return self.token.get('is_admin', False)
+
+    @cached_property
+    def full_user(self):
+        user = get_cached_user(self.id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return user
+
+    def __getattr__(self, attr):
+        if attr in self.token:
+            return self.token[attr]
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.full_user, attr)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Opt-in stateless authentication for read-only endpoints: the user is
+    built from the token claims without a query. Views using it must filter
+    by ``request.user.id`` rather than passing ``request.user`` to the ORM.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return ClaimsUser(validated_token)
@@ -0,0 +1,106 @@
+"""
+Admin dashboard statistics.
+
+The headline counters are computed in a single round-trip (the other
+tables are folded in as scalar subqueries of the orders aggregate) and the
+result, together with the daily series, is cached for
+``DASHBOARD_STATS_TTL`` seconds.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Subquery, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.marketplace.models import Gigs
+from apps.orders.models import Order
+from apps.payment.models import LahzaTransaction, WithdrawalRequest
+from .models import User
+
+DASHBOARD_CACHE_KEY = 'admin_dashboard_stats:{days}'
+DEFAULT_SERIES_DAYS = 30
+
+
+class ScalarSubquery(Subquery):
+    """
+    An uncorrelated subquery yielding one value. It's constant for the outer
+    query, so it must stay out of GROUP BY or an empty outer table would
+    return no row at all.
+    """
+
+    def get_group_by_cols(self):
+        return []
+
+
+def _scalar(queryset, aggregate):
+    """``(SELECT <aggregate> FROM ...)`` over the whole queryset."""
+    return ScalarSubquery(
+        queryset.order_by()
+        .annotate(_all=Value(1, output_field=IntegerField()))
+        .values('_all')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+
+
+def compute_totals():
+    zero = Decimal('0')
+    row = (
+        Order.objects.order_by()
+        .annotate(_all=Value(1, output_field=IntegerField()))
+        .values('_all')
+        .annotate(
+            total_orders=Count('pk'),
+            revenue=Sum('platform_fee', default=zero),
+            total_users=_scalar(User.objects.all(), Count('pk')),
+            active_gigs=_scalar(Gigs.objects.filter(is_active=True), Count('pk')),
+            total_received=_scalar(LahzaTransaction.objects.all(), Sum('amount', default=zero)),
+            total_withdrawn=_scalar(WithdrawalRequest.objects.all(), Sum('amount', default=zero)),
+        )
+        .values('total_orders', 'revenue', 'total_users', 'active_gigs', 'total_received', 'total_withdrawn')
+        .get()
+    )
+    return {
+        'total_users': row['total_users'],
+        'active_gigs': row['active_gigs'],
+        'total_orders': row['total_orders'],
+        'revenue': row['revenue'],
+        'held_money': row['total_received'] - row['total_withdrawn'],
+    }
+
+
+def compute_daily_series(days=DEFAULT_SERIES_DAYS):
+    """Orders and platform-fee revenue per day for the last ``days`` days, oldest first."""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = {
+        row['day']: row
+        for row in Order.objects.filter(created_at__date__gte=start)
+        .order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(orders=Count('pk'), revenue=Sum('platform_fee', default=Decimal('0')))
+    }
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {})
+        series.append({
+            'date': day,
+            'orders': row.get('orders', 0),
+            'revenue': row.get('revenue', Decimal('0')),
+        })
+    return series
+
+
+def get_dashboard_stats(days=DEFAULT_SERIES_DAYS):
+    key = DASHBOARD_CACHE_KEY.format(days=days)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_totals()
+        stats['series'] = compute_daily_series(days)
+        cache.set(key, stats, getattr(settings, 'DASHBOARD_STATS_TTL', 60))
+    return stats
@@ -0,0 +1,52 @@
+from django.db import models
+
+
+class LookupTableManager(models.Manager):
+    """
+    Caches a small reference table per process, in the spirit of
+    ContentTypeManager. Rows are loaded with one query on first use and
+    served from memory after that; the cache is cleared whenever a row
+    is saved or deleted (see the post_save/post_delete receivers). Rows
+    those signals don't see, such as ones added by another process, are
+    picked up by reloading once when a lookup misses.
+    """
+
+    def __init__(self, name_field):
+        super().__init__()
+        self.name_field = name_field
+        self._cache = {}
+
+    def _rows(self, reload=False):
+        if reload or not self._cache:
+            rows = list(self.all())
+            self._cache = {
+                'pk': {row.pk: row for row in rows},
+                'name': {getattr(row, self.name_field): row for row in rows},
+            }
+        return self._cache
+
+    def _lookup(self, key, values):
+        # A freshly loaded cache is current, so only a stale one is reloaded
+        stale = bool(self._cache)
+        rows = self._rows()[key]
+        if stale and any(value not in rows for value in values):
+            rows = self._rows(reload=True)[key]
+        return rows
+
+    def get_cached(self, pk=None, name=None):
+        """Return the row with this pk or name without hitting the database."""
+        key, value = ('pk', pk) if pk is not None else ('name', name)
+        try:
+            return self._lookup(key, [value])[value]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                f"{self.model._meta.object_name} matching {key}={value!r} does not exist."
+            )
+
+    def cached_ids(self, names):
+        """Primary keys of the rows with these names; names without a row are skipped."""
+        rows = self._lookup('name', names)
+        return [rows[name].pk for name in names if name in rows]
+
+    def clear_cache(self):
+        self._cache = {}
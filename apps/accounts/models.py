@@ -1,12 +1,14 @@
-from django.db.models import Avg
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
+from .managers import LookupTableManager
 
 class UserRoles(models.Model):
     role_id = models.AutoField(primary_key=True)
     role_name = models.CharField(max_length=50)
 
+    objects = LookupTableManager('role_name')
+
     class Meta:
         db_table = 'user_roles'
     
@@ -31,6 +33,9 @@ class User(AbstractUser):
     last_name = None
     
     is_verified = models.BooleanField(default=False)
+    # Denormalized from active received reviews, maintained by apps.reviews.signals
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     class Meta:
         db_table = 'users'
     
@@ -39,11 +44,11 @@ class User(AbstractUser):
 
     @property
     def average_rating(self):
-        return self.received_reviews.filter(is_active=True).aggregate(avg=Avg('rating'))['avg'] or 0
+        return self.rating_sum / self.rating_count if self.rating_count else 0
 
     @property
     def reviews_count(self):
-        return self.received_reviews.filter(is_active=True).count()
+        return self.rating_count
     
 
 class EmailVerificationCode(models.Model):
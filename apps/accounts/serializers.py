@@ -58,7 +58,7 @@ class UserSerializer(serializers.ModelSerializer):
 
         # Only allow roles Buyer or Seller
         try:
-            role = UserRoles.objects.get(pk=role_id)
+            role = UserRoles.objects.get_cached(pk=role_id)
             if role.role_name.lower() not in ['buyer', 'seller']:
                 raise serializers.ValidationError({'role_id': 'Only Buyer or Seller roles are allowed.'})
         except UserRoles.DoesNotExist:
@@ -150,7 +150,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['username'] = user.username
         token['email'] = user.email
         token['is_admin'] = user.is_superuser
-        token['user_role'] = user.role.role_name if user.role else None  # ✅ Add this
+        role = UserRoles.objects.get_cached(pk=user.role_id) if user.role_id else None
+        token['user_role'] = role.role_name if role else None  # ✅ Add this
         token['is_staff'] = user.is_staff
         return token
     def validate(self, attrs):
@@ -210,8 +211,9 @@ class EmailVerificationConfirmSerializer(serializers.Serializer):
         # Mark user as verified
         try:
             user = User.objects.get(email=data['email'])
-            user.is_verified = True
-            user.save()
+            if not user.is_verified:
+                user.is_verified = True
+                user.save(update_fields=['is_verified', 'updated_at'])
         except User.DoesNotExist:
             raise serializers.ValidationError("User with this email does not exist.")
 
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .authentication import invalidate_user
+from .models import User, UserRoles
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+@receiver([post_save, post_delete], sender=UserRoles)
+def clear_roles_cache(sender, **kwargs):
+    UserRoles.objects.clear_cache()
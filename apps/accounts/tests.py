@@ -1,7 +1,24 @@
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
+from apps.communications.messages.middleware import JWTAuthMiddleware
+from apps.communications.notification.models import Notification
+from apps.orders.models import Order, OrderStatus
+from apps.payment.models import LahzaTransaction, WithdrawalRequest
+from apps.payment.tests import MarketplaceFixtureMixin
+from .dashboard import get_dashboard_stats
+from .authentication import (
+    CachedJWTAuthentication, ClaimsJWTAuthentication, get_cached_user, invalidate_users, user_cache_stats,
+)
+from .serializers import CustomTokenObtainPairSerializer
 from .models import UserRoles
 
 User = get_user_model()
@@ -150,4 +167,130 @@ class AuthTests(APITestCase):
             'new_password': 'newpass123'
         }
         response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class CachedUserResolutionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache_stats.reset()
+        self.user = User.objects.create(username='cached', email='cached@example.com')
+        self.token = AccessToken.for_user(self.user)
+
+    def test_rest_authentication_uses_user_cache(self):
+        auth = CachedJWTAuthentication()
+        with self.assertNumQueries(1):
+            self.assertEqual(auth.get_user(self.token), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(auth.get_user(self.token), self.user)
+        self.assertEqual(user_cache_stats.snapshot(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_saving_user_invalidates_cache(self):
+        auth = CachedJWTAuthentication()
+        auth.get_user(self.token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            auth.get_user(self.token)
+
+    def test_bulk_updates_invalidate_explicitly(self):
+        auth = CachedJWTAuthentication()
+        auth.get_user(self.token)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        invalidate_users([self.user.pk])
+        with self.assertRaises(AuthenticationFailed):
+            auth.get_user(self.token)
+
+    @override_settings(USER_CACHE_STATS_LOG_EVERY=2)
+    def test_hit_rate_is_logged(self):
+        get_cached_user(self.user.id)
+        with self.assertLogs('apps.accounts.authentication', 'INFO') as logs:
+            get_cached_user(self.user.id)
+        self.assertEqual(logs.output, ['INFO:apps.accounts.authentication:JWT user cache: 1 hits, 1 misses, 50.0% hit rate'])
+
+    def test_websocket_middleware_resolves_cached_user(self):
+        get_cached_user(self.user.id)
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope)
+
+        middleware = JWTAuthMiddleware(app)
+        with self.assertNumQueries(0):
+            async_to_sync(middleware)({'type': 'websocket', 'query_string': f'token={self.token}'.encode()}, None, None)
+            async_to_sync(middleware)({'type': 'websocket', 'query_string': b'token=invalid'}, None, None)
+
+        self.assertEqual(scopes[0]['user'], self.user)
+        self.assertTrue(scopes[1]['user'].is_anonymous)
+
+
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        role = UserRoles.objects.create(role_name="Buyer")
+        self.user = User.objects.create(username='claims', email='claims@example.com', role=role, bio='Hi')
+        self.access = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def test_claims_user_needs_no_query(self):
+        user = ClaimsJWTAuthentication().get_user(self.access)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.id, self.user.id)
+            self.assertEqual(user.username, 'claims')
+            self.assertEqual(user.email, 'claims@example.com')
+            self.assertEqual(user.user_role, 'Buyer')
+            self.assertFalse(user.is_staff)
+            self.assertTrue(user.is_authenticated)
+
+    def test_missing_attributes_load_full_user(self):
+        user = ClaimsJWTAuthentication().get_user(self.access)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.bio, 'Hi')
+            self.assertEqual(user.role.role_name, 'Buyer')
+
+    def test_read_only_endpoint_skips_user_query(self):
+        Notification.objects.bulk_create([Notification(user=self.user, title='Hello', body='World')])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        # The page rows only, no users query
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('notification-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class DashboardStatsTests(MarketplaceFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_marketplace()
+        self.admin = User.objects.create(username='admin', email='admin@example.com', is_staff=True)
+        paid = self.order(self.gig, OrderStatus.COMPLETED, is_paid=True, platform_fee=Decimal('7.31'))
+        self.order(self.other_gig, OrderStatus.IN_PROGRESS)
+        LahzaTransaction.objects.create(
+            order=paid, user=self.buyer, transaction_type='payment', transaction_id='tx-1', amount=100, status='success'
+        )
+        WithdrawalRequest.objects.create(seller=self.seller, amount=30, first_name='A', last_name='B', iban='PS00')
+
+    def test_totals_are_one_query_and_cached(self):
+        with self.assertNumQueries(2):
+            stats = get_dashboard_stats(days=7)
+        self.assertEqual(stats['total_users'], 3)
+        self.assertEqual(stats['active_gigs'], 2)
+        self.assertEqual(stats['total_orders'], 2)
+        self.assertEqual(stats['revenue'], Decimal('7.31'))
+        self.assertEqual(stats['held_money'], Decimal('70'))
+        self.assertEqual(len(stats['series']), 7)
+        self.assertEqual(stats['series'][-1]['orders'], 2)
+        self.assertEqual(stats['series'][-1]['revenue'], Decimal('7.31'))
+        self.assertEqual(stats['series'][0]['orders'], 0)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard_stats(days=7), stats)
+
+    def test_empty_tables(self):
+        Order.objects.all().delete()
+        stats = get_dashboard_stats()
+        self.assertEqual((stats['total_orders'], stats['revenue']), (0, Decimal('0')))
+
+    def test_endpoint(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('admin-dashboard-stats'), {'days': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_orders'], 2)
+        self.assertEqual(len(response.data['series']), 3)
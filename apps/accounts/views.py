@@ -4,7 +4,6 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
-from django.db import models
 
 from .models import User
 from .serializers import (
@@ -17,9 +16,8 @@ from .serializers import (
     PublicUserProfileSerializer
 )
 
-from apps.marketplace.models import Gigs  
-from apps.orders.models import Order, OrderStatus  
-from apps.payment.models import LahzaTransaction, WithdrawalRequest
+from apps.payment.balances import get_seller_balance
+from .dashboard import DEFAULT_SERIES_DAYS, get_dashboard_stats
 
 
 class RegisterView(generics.CreateAPIView):
@@ -98,7 +96,7 @@ class PasswordChangeView(generics.GenericAPIView):
             )
             
         user.set_password(serializer.data['new_password'])
-        user.save()
+        user.save(update_fields=['password', 'updated_at'])
         return Response({"status": "password changed"})
 
 
@@ -138,26 +136,12 @@ class AdminDashboardStatsView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        print("USER:", request.user)
-        print("IS AUTHENTICATED:", request.user.is_authenticated)
-        print("IS STAFF:", request.user.is_staff)
+        try:
+            days = min(max(int(request.query_params.get('days', DEFAULT_SERIES_DAYS)), 1), 365)
+        except ValueError:
+            days = DEFAULT_SERIES_DAYS
 
-        total_users = User.objects.count()
-        active_gigs = Gigs.objects.filter(is_active=True).count()
-        total_orders = Order.objects.count()
-        total_revenue = Order.objects.aggregate(total=models.Sum('platform_fee'))['total'] or 0
-
-        total_received = LahzaTransaction.objects.aggregate(total=models.Sum('amount'))['total'] or 0
-        total_withdrawn = WithdrawalRequest.objects.aggregate(total=models.Sum('amount'))['total'] or 0
-        held_money = total_received - total_withdrawn
-
-        return Response({
-            'total_users': total_users,
-            'active_gigs': active_gigs,
-            'total_orders': total_orders,
-            'revenue': total_revenue,
-            'held_money': held_money,
-        })
+        return Response(get_dashboard_stats(days))
 
 
 
@@ -173,30 +157,10 @@ class SellerEarningsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-
-        status_in_progress = OrderStatus.objects.get(name="In Progress").id
-        status_delivered = OrderStatus.objects.get(name="Delivered").id
-        status_completed = OrderStatus.objects.get(name="Completed").id
-        valid_statuses = [status_in_progress, status_delivered, status_completed]
-
-        seller_gigs = Gigs.objects.filter(seller=user)
-        orders = Order.objects.filter(gig__in=seller_gigs, status__in=valid_statuses).select_related('gig')
-        
-        total_earnings = sum(order.gig.price for order in orders)
-
-        held_money = sum(
-            order.gig.price for order in orders
-            if order.status_id in [status_in_progress, status_delivered] and order.is_paid 
-        )
-
-        available_money = sum(
-            order.gig.price for order in orders
-            if order.status_id == status_completed and order.is_paid and not order.payout_sent
-        )
+        balance = get_seller_balance(request.user)
 
         return Response({
-            "total_earnings": total_earnings,
-            "held_money": held_money,
-            "available_money": available_money,
+            "total_earnings": balance.total_earned,
+            "held_money": balance.held,
+            "available_money": balance.available,
         }, status=200)
\ No newline at end of file
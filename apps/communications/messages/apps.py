@@ -4,3 +4,6 @@ class MessagesAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.communications.messages'
     label = 'chat_messages'  
+
+    def ready(self):
+        import apps.communications.messages.signals
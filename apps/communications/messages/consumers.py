@@ -1,19 +1,29 @@
+import asyncio
 import json
+import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from .models import Room, Message
-from apps.communications.notification.utils import notify_user
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from .models import Message
+from .membership import aget_room_participants
+from apps.communications.notification.dispatcher import adispatch
+from apps.communications.notification.models import Notification
 
-from django.contrib.auth import get_user_model
-User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.room_id = self.scope['url_route']['kwargs']['room_id']
+        self.room_id = int(self.scope['url_route']['kwargs']['room_id'])
         self.user = self.scope["user"]
         self.room_group_name = f"chat_{self.room_id}"
+        self.pending_tasks = set()
+
+        # Participants come from the membership cache, once per connection
+        self.participants = await aget_room_participants(self.room_id)
+        if self.participants is None or self.user.id not in self.participants:
+            await self.close()
+            return
+        user1_id, user2_id = self.participants
+        self.receiver_id = user1_id if user2_id == self.user.id else user2_id
 
         # Join room group
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
@@ -24,14 +34,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def mark_messages_as_read(self):
-        try:
-            room = Room.objects.get(id=self.room_id)
-            if self.user in [room.user1, room.user2]:
-                Message.objects.filter(room=room, is_read=False).exclude(sender=self.user).update(is_read=True)
-        except Room.DoesNotExist:
-            pass
+        Message.objects.filter(room_id=self.room_id, is_read=False).exclude(sender_id=self.user.id).update(is_read=True)
 
     async def disconnect(self, close_code):
+        if self.pending_tasks:
+            await asyncio.gather(*self.pending_tasks, return_exceptions=True)
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
@@ -40,9 +47,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         data = json.loads(text_data)
         message_text = data['message']
-        sender_id = self.scope['user'].id
+        sender_id = self.user.id
 
-        msg = await self.save_message(sender_id, self.room_id, message_text)
+        msg = await self.save_message(sender_id, message_text)
 
         await self.channel_layer.group_send(
             self.room_group_name,
@@ -57,6 +64,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
             }
         )
 
+        # Room update and notification don't hold up the next message
+        task = asyncio.create_task(self.notify_receiver())
+        self.pending_tasks.add(task)
+        task.add_done_callback(self.fan_out_done)
+
     async def chat_message(self, event):
         await self.send(text_data=json.dumps({
             'message': event['message'],
@@ -68,30 +80,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
 
     @database_sync_to_async
-    def save_message(self, sender_id, room_id, content):
-        sender = User.objects.get(id=sender_id)
-        room = Room.objects.get(id=room_id)
-        message = Message.objects.create(sender=sender, room=room, content=content)
+    def save_message(self, sender_id, content):
+        return Message.objects.create(sender_id=sender_id, room_id=self.room_id, content=content)
 
-        receiver = room.user1 if room.user2 == sender else room.user2
-
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f"user_{receiver.id}_room_updates",
+    async def notify_receiver(self):
+        await self.channel_layer.group_send(
+            f"user_{self.receiver_id}_room_updates",
             {
                 "type": "room_update",
-                "room": room.id,
-                "sender": sender.id,
+                "room": self.room_id,
+                "sender": self.user.id,
             }
         )
-        notify_user(
-            user=receiver,
+        await adispatch([Notification(
+            user_id=self.receiver_id,
             title="New Message",
-            body=f"You received a message from {sender.username}",
+            body=f"You received a message from {self.user.username}",
             notification_type="message"
-        )
+        )])
 
-        return message
+    def fan_out_done(self, task):
+        self.pending_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error("Chat fan-out failed for room %s", self.room_id, exc_info=task.exception())
     
 
 
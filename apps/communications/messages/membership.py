@@ -0,0 +1,46 @@
+"""
+Room membership cache.
+
+Room participants never change once a room exists, so ``room id ->
+(user1_id, user2_id)`` is cached and authorization on the hot path costs
+no queries. Entries live in the default cache, a process-local LRU with
+TTL. Unknown rooms are not cached: another process may create the room
+at any moment, and only this process would see its invalidation.
+"""
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+
+from .models import Room
+
+ROOM_MEMBERS_TTL = 60 * 10
+
+
+def room_members_key(room_id):
+    return f"room_members:{room_id}"
+
+
+def _load_participants(room_id):
+    participants = Room.objects.filter(pk=room_id).values_list('user1_id', 'user2_id').first()
+    if participants is not None:
+        participants = tuple(participants)
+        cache.set(room_members_key(room_id), participants, ROOM_MEMBERS_TTL)
+    return participants
+
+
+def get_room_participants(room_id):
+    """Return (user1_id, user2_id) for the room, or None if it doesn't exist."""
+    participants = cache.get(room_members_key(room_id))
+    if participants is None:
+        participants = _load_participants(room_id)
+    return participants
+
+
+async def aget_room_participants(room_id):
+    participants = await cache.aget(room_members_key(room_id))
+    if participants is None:
+        participants = await database_sync_to_async(_load_participants)(room_id)
+    return participants
+
+
+def invalidate_room(room_id):
+    cache.delete(room_members_key(room_id))
@@ -2,37 +2,26 @@ from urllib.parse import parse_qs
 from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import UntypedToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from django.conf import settings
-from jwt import decode as jwt_decode
-from channels.db import database_sync_to_async
-
-from django.contrib.auth import get_user_model
-User = get_user_model()
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from apps.accounts.authentication import aget_cached_user
 
 class JWTAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
         query_string = parse_qs(scope["query_string"].decode())
         token = query_string.get("token", [None])[0]
 
-        if token is None:
-            scope["user"] = AnonymousUser()
-            return await super().__call__(scope, receive, send)
+        scope["user"] = AnonymousUser()
+        if token is not None:
+            try:
+                # Verifies signature and expiry; decoded only once
+                user_id = UntypedToken(token).get(api_settings.USER_ID_CLAIM)
+            except TokenError:
+                user_id = None
 
-        try:
-            UntypedToken(token)
-            decoded_data = jwt_decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user_id = decoded_data.get("user_id")
-            user = await self.get_user(user_id)
-            scope["user"] = user or AnonymousUser()
-        except (InvalidToken, TokenError, KeyError):
-            scope["user"] = AnonymousUser()
+            if user_id is not None:
+                user = await aget_cached_user(user_id)
+                if user is not None and user.is_active:
+                    scope["user"] = user
 
         return await super().__call__(scope, receive, send)
-
-    @database_sync_to_async
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            return None
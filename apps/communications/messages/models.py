@@ -1,15 +1,53 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 
 # Create your models here.
 
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
+
+class RoomQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(Q(user1=user) | Q(user2=user))
+
+    def inbox(self, user):
+        """
+        A user's rooms with the last message, unread count and both
+        participants loaded in a single query, newest activity first.
+        """
+        last_message = Message.objects.filter(room=OuterRef('pk')).order_by('-timestamp', '-id')
+        unread = (
+            Message.objects.filter(room=OuterRef('pk'), is_read=False)
+            .exclude(sender=user)
+            .order_by()
+            .values('room')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return (
+            self.for_user(user)
+            .select_related('user1', 'user2')
+            .annotate(
+                last_message_id=Subquery(last_message.values('id')[:1]),
+                last_message_sender_id=Subquery(last_message.values('sender_id')[:1]),
+                last_message_content=Subquery(last_message.values('content')[:1]),
+                last_message_timestamp=Subquery(last_message.values('timestamp')[:1]),
+                last_message_is_read=Subquery(last_message.values('is_read')[:1]),
+                unread_count=Coalesce(Subquery(unread), Value(0)),
+                last_activity=Coalesce('last_message_timestamp', 'created_at'),
+            )
+        )
+
+
 class Room(models.Model):
     user1 = models.ForeignKey(User, related_name='room_user1', on_delete=models.CASCADE)
     user2 = models.ForeignKey(User, related_name='room_user2', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = RoomQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user1', 'user2')
 
@@ -24,5 +62,11 @@ class Message(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Serves keyset pagination of a room's history and its last message
+            models.Index(fields=['room', 'timestamp', 'id'], name='message_room_timestamp_idx'),
+        ]
+
     def __str__(self):
         return f"Message from {self.sender} in Room {self.room.id}"
@@ -0,0 +1,78 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+
+
+class InboxCursorPagination(CursorPagination):
+    """Pages through a user's rooms by last activity, newest first."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-last_activity', '-id')
+
+
+class MessageKeysetPagination(BasePagination):
+    """
+    Keyset pagination over a room's history, returned oldest first.
+
+    Without parameters the latest page is returned. ``before=<message_id>``
+    scrolls back to older messages and ``after=<message_id>`` fetches only
+    messages newer than the client's last seen one, both in O(page) using
+    the (room, timestamp, id) index.
+    """
+    page_size = 50
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get('limit', self.page_size))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        return max(1, min(size, self.max_page_size))
+
+    def get_anchor(self, queryset, request, param):
+        message_id = request.query_params.get(param)
+        if message_id is None:
+            return None
+        try:
+            anchor = queryset.filter(pk=int(message_id)).values_list('timestamp', 'id').first()
+        except ValueError:
+            anchor = None
+        if anchor is None:
+            raise ValidationError({param: 'Unknown message id.'})
+        return anchor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        after = self.get_anchor(queryset, request, 'after')
+
+        if after:
+            timestamp, message_id = after
+            queryset = queryset.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=message_id)
+            ).order_by('timestamp', 'id')
+        else:
+            before = self.get_anchor(queryset, request, 'before')
+            if before:
+                timestamp, message_id = before
+                queryset = queryset.filter(
+                    Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id)
+                )
+            queryset = queryset.order_by('-timestamp', '-id')
+
+        # Fetch one extra row to know whether another page exists
+        messages = list(queryset[:page_size + 1])
+        self.has_more = len(messages) > page_size
+        messages = messages[:page_size]
+        if not after:
+            messages.reverse()
+        return messages
+
+    def get_paginated_response(self, data):
+        return Response({
+            'has_more': self.has_more,
+            'oldest_id': data[0]['id'] if data else None,
+            'newest_id': data[-1]['id'] if data else None,
+            'results': data,
+        })
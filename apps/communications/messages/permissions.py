@@ -1,5 +1,16 @@
 from rest_framework import permissions
+from rest_framework.exceptions import NotFound
+from .membership import get_room_participants
 
 class IsRoomParticipant(permissions.BasePermission):
+    def has_permission(self, request, view):
+        room_id = view.kwargs.get('room_id')
+        if room_id is None:
+            return True
+        participants = get_room_participants(room_id)
+        if participants is None:
+            raise NotFound("Room not found.")
+        return request.user.id in participants
+
     def has_object_permission(self, request, view, obj):
-        return request.user == obj.user1 or request.user == obj.user2
+        return request.user.id in (obj.user1_id, obj.user2_id)
@@ -27,7 +27,20 @@ class RoomSerializer(serializers.ModelSerializer):
         fields = ['id', 'user1',  'created_at', 'last_message', 'other_user', 'unread_count']
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.order_by('-timestamp').first()
+        if hasattr(obj, 'last_message_id'):
+            # Annotated by Room.objects.inbox(), no extra query needed
+            if obj.last_message_id is None:
+                return None
+            last_msg = Message(
+                id=obj.last_message_id,
+                room_id=obj.id,
+                sender_id=obj.last_message_sender_id,
+                content=obj.last_message_content,
+                timestamp=obj.last_message_timestamp,
+                is_read=obj.last_message_is_read,
+            )
+        else:
+            last_msg = obj.messages.order_by('-timestamp').first()
         return MessageSerializer(last_msg).data if last_msg else None
 
     def get_other_user(self, obj):
@@ -35,11 +48,12 @@ class RoomSerializer(serializers.ModelSerializer):
         if not request:
             return None
 
-        current_user = request.user
-        other_user = obj.user2 if obj.user1 == current_user else obj.user1
+        other_user = obj.user2 if obj.user1_id == request.user.id else obj.user1
         return UserSummarySerializer(other_user).data
     
     def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_count'):
+            return obj.unread_count
         request = self.context.get("request", None)
         if request is None:
             return 0
@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .membership import invalidate_room
+from .models import Room
+
+@receiver(post_save, sender=Room)
+def room_created(sender, instance, created, **kwargs):
+    if created:
+        invalidate_room(instance.id)
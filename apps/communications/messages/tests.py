@@ -1,3 +1,192 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+
+from apps.communications.notification.dispatcher import LocalBackend
+from apps.communications.notification.models import Notification
+from .membership import room_members_key
+from .models import Room, Message
+from .routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+class InboxTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='me', email='me@example.com')
+        self.others = [
+            User.objects.create(username=f'other{i}', email=f'other{i}@example.com') for i in range(3)
+        ]
+        self.rooms = [Room.objects.create(user1=self.user, user2=other) for other in self.others]
+        self.client.force_authenticate(user=self.user)
+
+    def add_message(self, room, sender, minutes_ago, is_read=False):
+        message = Message.objects.create(room=room, sender=sender, content=f'{minutes_ago} min ago', is_read=is_read)
+        Message.objects.filter(pk=message.pk).update(timestamp=timezone.now() - timedelta(minutes=minutes_ago))
+        return message
+
+    def test_inbox_annotations_and_ordering(self):
+        self.add_message(self.rooms[0], self.others[0], 30)
+        latest = self.add_message(self.rooms[0], self.others[0], 20)
+        self.add_message(self.rooms[1], self.user, 10)
+        self.add_message(self.rooms[1], self.others[1], 5, is_read=True)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('room-list-create'))
+
+        results = response.data['results']
+        # Room 2 has no messages, so its creation time is the most recent activity
+        self.assertEqual([room['id'] for room in results], [self.rooms[2].id, self.rooms[1].id, self.rooms[0].id])
+        self.assertIsNone(results[0]['last_message'])
+        self.assertEqual(results[1]['unread_count'], 0)
+        self.assertEqual(results[2]['unread_count'], 2)
+        self.assertEqual(results[2]['last_message']['id'], latest.id)
+        self.assertEqual(results[2]['last_message']['content'], latest.content)
+        self.assertEqual(results[2]['other_user']['username'], 'other0')
+
+    def test_inbox_is_cursor_paginated(self):
+        response = self.client.get(reverse('room-list-create'), {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+
+class MessageHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='me', email='me@example.com')
+        other = User.objects.create(username='other', email='other@example.com')
+        self.room = Room.objects.create(user1=self.user, user2=other)
+        self.messages = Message.objects.bulk_create([
+            Message(room=self.room, sender=self.user, content=f'Message {i}') for i in range(12)
+        ])
+        self.url = reverse('message-list-create', kwargs={'room_id': self.room.id})
+        self.client.force_authenticate(user=self.user)
+
+    def ids(self, response):
+        return [message['id'] for message in response.data['results']]
+
+    def test_latest_page_is_returned_oldest_first(self):
+        response = self.client.get(self.url, {'limit': 5})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[7:]])
+        self.assertTrue(response.data['has_more'])
+        self.assertEqual(response.data['oldest_id'], self.messages[7].id)
+
+    def test_scroll_back_with_before(self):
+        response = self.client.get(self.url, {'limit': 5, 'before': self.messages[7].id})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[2:7]])
+        self.assertTrue(response.data['has_more'])
+
+        response = self.client.get(self.url, {'limit': 5, 'before': self.messages[2].id})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[:2]])
+        self.assertFalse(response.data['has_more'])
+
+    def test_fetch_newer_with_after(self):
+        response = self.client.get(self.url, {'after': self.messages[9].id})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[10:]])
+        self.assertFalse(response.data['has_more'])
+
+    def test_unknown_anchor_is_rejected(self):
+        response = self.client.get(self.url, {'before': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RoomMembershipTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='me', email='me@example.com')
+        self.other = User.objects.create(username='other', email='other@example.com')
+        self.outsider = User.objects.create(username='outsider', email='outsider@example.com')
+        self.room = Room.objects.create(user1=self.user, user2=self.other)
+        self.url = reverse('message-list-create', kwargs={'room_id': self.room.id})
+
+    def test_non_participant_is_forbidden(self):
+        self.client.force_authenticate(user=self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.post(self.url, {'content': 'hi'}).status_code, 403)
+
+    def test_unknown_room_is_not_found(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('message-list-create', kwargs={'room_id': self.room.id + 100})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # Another process may create the room, so the miss isn't remembered
+        self.assertIsNone(cache.get(room_members_key(self.room.id + 100)))
+
+    def test_membership_is_cached(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get(self.url)
+        # Only the message page itself is queried once membership is cached
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_new_room_is_found_after_a_miss(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get(reverse('message-list-create', kwargs={'room_id': self.room.id + 1}))
+
+        response = self.client.post(reverse('room-list-create'), {'user_id': self.outsider.id})
+        room_url = reverse('message-list-create', kwargs={'room_id': response.data['id']})
+        self.assertEqual(self.client.get(room_url).status_code, 200)
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    NOTIFICATION_BACKEND='apps.communications.notification.dispatcher.LocalBackend',
+)
+class ChatConsumerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        LocalBackend.clear()
+        self.sender = User.objects.create(username='sender', email='sender@example.com')
+        self.receiver = User.objects.create(username='receiver', email='receiver@example.com')
+        self.room = Room.objects.create(user1=self.sender, user2=self.receiver)
+
+    def communicator(self, user, room_id):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/messages/{room_id}/")
+        communicator.scope['user'] = user
+        return communicator
+
+    @async_to_sync
+    async def chat(self, text):
+        communicator = self.communicator(self.sender, self.room.id)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.send_json_to({'message': text})
+        response = await communicator.receive_json_from()
+        await communicator.disconnect()
+        return response
+
+    def test_message_is_saved_broadcast_and_notified(self):
+        response = self.chat('Hello there')
+
+        message = Message.objects.get()
+        self.assertEqual(response['message_id'], message.id)
+        self.assertEqual(response['sender_id'], self.sender.id)
+        self.assertEqual(message.room_id, self.room.id)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user_id, self.receiver.id)
+        self.assertEqual(notification.notification_type, 'message')
+        self.assertEqual([group for group, _ in LocalBackend.sent], [f"user_{self.receiver.id}"])
+
+    @async_to_sync
+    async def test_unknown_room_is_rejected(self):
+        communicator = self.communicator(self.sender, self.room.id + 100)
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    @async_to_sync
+    async def test_non_participant_is_rejected(self):
+        outsider = await User.objects.acreate(username='outsider', email='outsider@example.com')
+        communicator = self.communicator(outsider, self.room.id)
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
@@ -5,8 +5,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .permissions import IsRoomParticipant
-from django.db.models import Max, F
-from django.db.models.functions import Coalesce
+from .pagination import InboxCursorPagination, MessageKeysetPagination
 # Create your views here.
 from django.contrib.auth import get_user_model
 User = get_user_model()
@@ -15,12 +14,11 @@ class RoomListCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        rooms = Room.objects.filter(user1=request.user) | Room.objects.filter(user2=request.user)
-        rooms = rooms.annotate(
-        sort_time=Coalesce(Max('messages__timestamp'), F('created_at'))
-        ).order_by('-sort_time')
-        serializer = RoomSerializer(rooms, many=True, context={'request': request})
-        return Response(serializer.data)
+        rooms = Room.objects.inbox(request.user)
+        paginator = InboxCursorPagination()
+        page = paginator.paginate_queryset(rooms, request, view=self)
+        serializer = RoomSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         user_id = request.data.get('user_id')
@@ -41,14 +39,11 @@ class RoomListCreateView(APIView):
 class MessageListCreateView(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated, IsRoomParticipant]
+    pagination_class = MessageKeysetPagination
 
+    # Membership is checked by IsRoomParticipant from the cached participants
     def get_queryset(self):
-        room_id = self.kwargs['room_id']
-        room = Room.objects.get(id=room_id)
-        self.check_object_permissions(self.request, room)
-        return room.messages.all().order_by('timestamp')
+        return Message.objects.filter(room_id=self.kwargs['room_id'])
 
     def perform_create(self, serializer):
-        room = Room.objects.get(id=self.kwargs['room_id'])
-        self.check_object_permissions(self.request, room)
-        serializer.save(sender=self.request.user, room=room)
+        serializer.save(sender=self.request.user, room_id=self.kwargs['room_id'])
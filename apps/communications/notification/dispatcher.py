@@ -0,0 +1,135 @@
+"""
+Batched notification fan-out.
+
+Notifications are persisted with a single ``bulk_create`` inside the
+caller's transaction and handed to a publishing backend once that
+transaction commits, so requests never wait on the channel layer.
+"""
+import asyncio
+import logging
+import queue
+import threading
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Notification
+from .unread import ainvalidate_unread_counts, invalidate_unread_counts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'apps.communications.notification.dispatcher.ChannelLayerBackend'
+
+
+class ChannelLayerBackend:
+    """
+    Publishes to the channel layer (Redis) from a background thread.
+
+    ``submit`` only enqueues; the worker thread drains the queue and sends
+    up to ``NOTIFICATION_BATCH_SIZE`` group messages per event-loop hop on
+    a single long-lived loop, reusing its Redis connections.
+    """
+
+    def __init__(self):
+        self.batch_size = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100)
+        self.queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, events):
+        for event in events:
+            self.queue.put(event)
+        self._ensure_worker()
+
+    async def apublish(self, events):
+        channel_layer = get_channel_layer()
+        await asyncio.gather(*(channel_layer.group_send(group, message) for group, message in events))
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='notification-publisher', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                loop.run_until_complete(self.apublish(batch))
+            except Exception:
+                logger.exception("Failed to publish %d notifications", len(batch))
+
+
+class LocalBackend:
+    """In-process stand-in for the channel layer, used by tests."""
+    sent = []
+
+    def submit(self, events):
+        self.sent.extend(events)
+
+    async def apublish(self, events):
+        self.submit(events)
+
+    @classmethod
+    def clear(cls):
+        cls.sent.clear()
+
+
+_backends = {}
+
+
+def get_backend():
+    path = getattr(settings, 'NOTIFICATION_BACKEND', DEFAULT_BACKEND)
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def build_event(notification):
+    return (
+        f"user_{notification.user_id}",
+        {
+            "type": "send_notification",
+            "content": {
+                "title": notification.title,
+                "body": notification.body,
+                "type": notification.notification_type,
+                "url": notification.target_url,
+                "created_at": str(notification.created_at),
+            },
+        },
+    )
+
+
+def dispatch(notifications):
+    """
+    Persist unsaved Notification instances in one INSERT and publish them
+    after the surrounding transaction commits (immediately in autocommit).
+    """
+    notifications = Notification.objects.bulk_create(notifications)
+    events = [build_event(notification) for notification in notifications]
+    if events:
+        backend = get_backend()
+        user_ids = [notification.user_id for notification in notifications]
+        transaction.on_commit(lambda: invalidate_unread_counts(user_ids))
+        transaction.on_commit(lambda: backend.submit(events))
+    return notifications
+
+
+async def adispatch(notifications):
+    """Async variant of dispatch() for consumers already on an event loop."""
+    notifications = await database_sync_to_async(Notification.objects.bulk_create)(notifications)
+    events = [build_event(notification) for notification in notifications]
+    if events:
+        await ainvalidate_unread_counts([notification.user_id for notification in notifications])
+        await get_backend().apublish(events)
+    return notifications
@@ -10,3 +10,9 @@ class NotificationSerializer(serializers.ModelSerializer):
 
 class MarkNotificationReadSerializer(serializers.Serializer):
     notification_id = serializers.IntegerField()
+
+class MarkNotificationsReadSerializer(serializers.Serializer):
+    """Selects the notifications to mark read; with no fields, all of them."""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    notification_type = serializers.ChoiceField(choices=Notification.NOTIFICATION_TYPES, required=False)
+    before = serializers.DateTimeField(required=False)
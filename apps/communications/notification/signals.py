@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from apps.orders.models import Order
+from .models import Notification
+from .unread import invalidate_unread_counts
 from .utils import notify_user
 
 @receiver(post_save, sender=Order)
@@ -12,3 +15,8 @@ def new_order_notify(sender, instance, created, **kwargs):
             body=f"Order #{instance.id} has been placed.",
             notification_type="order"
         )
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def drop_unread_count(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_unread_counts([instance.user_id]))
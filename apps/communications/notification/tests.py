@@ -1,3 +1,117 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+
+from .dispatcher import LocalBackend
+from .models import Notification
+from .unread import get_unread_count
+from .utils import notify_user, notify_users
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATION_BACKEND='apps.communications.notification.dispatcher.LocalBackend')
+class NotificationDispatchTests(TestCase):
+    def setUp(self):
+        LocalBackend.clear()
+        self.users = [User.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(5)]
+
+    def test_notify_users_persists_in_one_insert(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                notify_users(self.users, title="Hello", body="World", notification_type="system")
+
+        self.assertEqual(Notification.objects.filter(title="Hello").count(), 5)
+        self.assertEqual(
+            sorted(group for group, _ in LocalBackend.sent),
+            sorted(f"user_{user.id}" for user in self.users),
+        )
+        group, message = LocalBackend.sent[0]
+        self.assertEqual(message['type'], 'send_notification')
+        self.assertEqual(message['content']['type'], 'system')
+
+    def test_publishes_only_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            notify_user(self.users[0], title="Pending", body="Not yet")
+            self.assertEqual(LocalBackend.sent, [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(LocalBackend.sent), 1)
+
+    def test_rolled_back_notifications_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    notify_user(self.users[0], title="Rolled back", body="Never")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertFalse(Notification.objects.filter(title="Rolled back").exists())
+        self.assertEqual(LocalBackend.sent, [])
+
+
+@override_settings(NOTIFICATION_BACKEND='apps.communications.notification.dispatcher.LocalBackend')
+class NotificationInboxTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader', email='reader@example.com')
+        self.other = User.objects.create(username='other', email='other@example.com')
+        self.notifications = Notification.objects.bulk_create([
+            Notification(user=self.user, title=f'n{i}', body='b', notification_type='order' if i % 2 else 'message')
+            for i in range(6)
+        ])
+        Notification.objects.create(user=self.other, title='theirs', body='b')
+        self.client.force_authenticate(user=self.user)
+
+    def unread_count(self):
+        return self.client.get(reverse('notification-unread-count')).data['unread_count']
+
+    def test_unread_count_is_cached_and_invalidated(self):
+        self.assertEqual(self.unread_count(), 6)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user.id), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_user(self.user, title="New", body="One more")
+        self.assertEqual(self.unread_count(), 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('notification-mark-read'), {'notification_id': self.notifications[0].pk})
+        self.assertEqual(self.unread_count(), 6)
+
+    def test_mark_all_read_is_one_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                response = self.client.post(reverse('notification-mark-all-read'), {}, format='json')
+        self.assertEqual(response.data['updated'], 6)
+        self.assertEqual(self.unread_count(), 0)
+        self.assertFalse(Notification.objects.get(user=self.other).is_read)
+
+    def test_mark_read_by_ids_type_and_age(self):
+        url = reverse('notification-mark-all-read')
+        ids = [self.notifications[0].pk, self.notifications[1].pk, self.other.notifications.get().pk]
+        self.assertEqual(self.client.post(url, {'ids': ids}, format='json').data['updated'], 2)
+        self.assertEqual(self.client.post(url, {'notification_type': 'order'}, format='json').data['updated'], 2)
+
+        Notification.objects.filter(pk=self.notifications[2].pk).update(created_at=timezone.now() - timedelta(days=2))
+        before = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.client.post(url, {'before': before}, format='json').data['updated'], 1)
+        self.assertEqual(Notification.objects.filter(user=self.user, is_read=False).count(), 1)
+
+    def test_list_is_cursor_paginated_and_filterable(self):
+        response = self.client.get(reverse('notification-list'), {'page_size': 4})
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 2)
+
+        Notification.objects.filter(pk=self.notifications[0].pk).update(is_read=True)
+        response = self.client.get(reverse('notification-list'), {'is_read': 'false', 'type': 'message'})
+        self.assertEqual(len(response.data['results']), 2)
@@ -0,0 +1,34 @@
+"""
+Per-user unread notification counts.
+
+The count is cached per user and dropped whenever that user's
+notifications are created or marked read, so polling clients hit the
+cache instead of counting rows. A miss is one COUNT served by the partial
+unread index.
+"""
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+
+from .models import Notification
+
+UNREAD_COUNT_TTL = 60 * 5
+
+
+def unread_count_key(user_id):
+    return f"notifications_unread:{user_id}"
+
+
+def get_unread_count(user_id):
+    count = cache.get(unread_count_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(unread_count_key(user_id), count, UNREAD_COUNT_TTL)
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([unread_count_key(user_id) for user_id in set(user_ids)])
+
+
+async def ainvalidate_unread_counts(user_ids):
+    await database_sync_to_async(invalidate_unread_counts)(user_ids)
@@ -1,7 +1,14 @@
 from django.urls import path
-from .views import NotificationListView, MarkNotificationReadView
+from .views import (
+    NotificationListView,
+    MarkNotificationReadView,
+    MarkNotificationsReadView,
+    UnreadNotificationCountView,
+)
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notification-list'),
+    path('unread-count/', UnreadNotificationCountView.as_view(), name='notification-unread-count'),
     path('mark-read/', MarkNotificationReadView.as_view(), name='notification-mark-read'),
+    path('mark-all-read/', MarkNotificationsReadView.as_view(), name='notification-mark-all-read'),
 ]
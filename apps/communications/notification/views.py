@@ -1,16 +1,39 @@
+from django.db import transaction
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.accounts.authentication import ClaimsJWTAuthentication
 from .models import Notification
-from .serializers import NotificationSerializer, MarkNotificationReadSerializer
+from .pagination import NotificationCursorPagination
+from .serializers import NotificationSerializer, MarkNotificationReadSerializer, MarkNotificationsReadSerializer
+from .unread import get_unread_count, invalidate_unread_counts
 
 # Create your views here.
 
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = NotificationCursorPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        queryset = Notification.objects.filter(user_id=self.request.user.id)
+
+        is_read = self.request.query_params.get('is_read')
+        if is_read in ('true', 'false'):
+            queryset = queryset.filter(is_read=is_read == 'true')
+
+        notification_type = self.request.query_params.get('type')
+        if notification_type:
+            queryset = queryset.filter(notification_type=notification_type)
+        return queryset
+
+class UnreadNotificationCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request):
+        return Response({"unread_count": get_unread_count(request.user.id)})
 
 class MarkNotificationReadView(generics.UpdateAPIView):
     serializer_class = MarkNotificationReadSerializer
@@ -20,10 +43,33 @@ class MarkNotificationReadView(generics.UpdateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         notification_id = serializer.validated_data['notification_id']
-        try:
-            notif = Notification.objects.get(id=notification_id, user=request.user)
-            notif.is_read = True
-            notif.save()
+        notifications = Notification.objects.filter(id=notification_id, user_id=request.user.id)
+        # Only unread rows are written; the existence check runs only when nothing was
+        if notifications.filter(is_read=False).update(is_read=True):
+            transaction.on_commit(lambda: invalidate_unread_counts([request.user.id]))
+            return Response({"detail": "Marked as read."})
+        if notifications.exists():
             return Response({"detail": "Marked as read."})
-        except Notification.DoesNotExist:
-            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+class MarkNotificationsReadView(APIView):
+    """Marks the user's unread notifications read in one UPDATE, by ids, type and/or age."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkNotificationsReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        notifications = Notification.objects.filter(user_id=request.user.id, is_read=False)
+        if 'ids' in data:
+            notifications = notifications.filter(id__in=data['ids'])
+        if 'notification_type' in data:
+            notifications = notifications.filter(notification_type=data['notification_type'])
+        if 'before' in data:
+            notifications = notifications.filter(created_at__lte=data['before'])
+
+        updated = notifications.update(is_read=True)
+        if updated:
+            transaction.on_commit(lambda: invalidate_unread_counts([request.user.id]))
+        return Response({"updated": updated})
@@ -0,0 +1,93 @@
+"""
+Sparse fieldsets for list endpoints.
+
+``?fields=id,title,price`` returns only the named fields and
+``?view=summary`` the serializer's ``Meta.summary_fields``. The queryset is
+narrowed to match: ``.only()`` loads just the columns those fields read
+and ``select_related`` keeps only the relations they traverse.
+
+Serializer fields map to model paths through their ``source``; fields
+that don't resolve to columns (properties, method fields) declare theirs
+in ``Meta.field_paths``. If any requested field can't be mapped, the
+queryset is left unrestricted and only the JSON is trimmed.
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+
+class SparseFieldsetSerializerMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+
+
+def _is_model_path(model, path):
+    for part in path.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        model = field.related_model
+    return True
+
+
+def model_paths(serializer, name):
+    """The model paths a serializer field reads, or None if unknown."""
+    overrides = getattr(serializer.Meta, 'field_paths', {})
+    if name in overrides:
+        return tuple(overrides[name])
+    path = serializer.fields[name].source.replace('.', '__')
+    if _is_model_path(serializer.Meta.model, path):
+        return (path,)
+    return None
+
+
+class SparseFieldsetMixin:
+    """For list views whose serializer uses SparseFieldsetSerializerMixin."""
+
+    def get_requested_fields(self):
+        """The selected field names, or None to return every field."""
+        if not hasattr(self, '_requested_fields'):
+            params = self.request.query_params
+            # Built with the view's context so context-dependent fields
+            # (e.g. the admin-only ones) count as available
+            serializer_class = self.get_serializer_class()
+            available = serializer_class(context=self.get_serializer_context()).fields
+            names = []
+            if params.get('fields'):
+                names = params['fields'].split(',')
+            elif params.get('view') == 'summary':
+                names = serializer_class.Meta.summary_fields
+            self._requested_fields = [name for name in names if name in available] or None
+        return self._requested_fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', self.get_serializer_context())
+        kwargs['context']['fields'] = self.get_requested_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_requested_fields()
+        if not fields:
+            return queryset
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        paths = set()
+        for name in fields:
+            field_paths = model_paths(serializer, name)
+            if field_paths is None:
+                return queryset
+            paths.update(field_paths)
+
+        # Traversed relations are joined; a trailing FK only needs its id column
+        relations = {
+            '__'.join(parts[:depth])
+            for parts in (path.split('__') for path in paths)
+            for depth in range(1, len(parts))
+        }
+        pk_name = queryset.model._meta.pk.name
+        return queryset.select_related(None).select_related(*relations).only(pk_name, *paths)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.marketplace.ranking import refresh_gig_rankings
+
+
+class Command(BaseCommand):
+    help = "Re-scores every gig in the top-rated ranking against the current marketplace mean"
+
+    def add_arguments(self, parser):
+        parser.add_argument('gig_ids', nargs='*', type=int, help="Only re-score these gigs")
+
+    def handle(self, *args, **options):
+        count = refresh_gig_rankings(options['gig_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"{count} gigs ranked"))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0004_gigs_saved_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gigs',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gigs',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
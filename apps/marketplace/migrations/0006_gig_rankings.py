@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0005_gigs_rating_count_gigs_rating_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GigRanking',
+            fields=[
+                ('gig', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='marketplace.gigs')),
+                ('score', models.FloatField(db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'gig_rankings',
+            },
+        ),
+    ]
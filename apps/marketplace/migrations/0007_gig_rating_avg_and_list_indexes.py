@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 11:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+
+def backfill_rating_avg(apps, schema_editor):
+    Gigs = apps.get_model('marketplace', 'Gigs')
+    Gigs.objects.filter(rating_count__gt=0).update(rating_avg=Cast('rating_sum', FloatField()) / F('rating_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0006_gig_rankings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gigs',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_avg, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='gigs',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'price', 'id'], name='gig_service_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gigs',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', '-created_at', '-id'], name='gig_service_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gigs',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', '-rating_avg', '-id'], name='gig_service_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gigs',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'delivery_time'], name='gig_service_delivery_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 11:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_search_vectors(apps, schema_editor):
+    Gigs = apps.get_model('marketplace', 'Gigs')
+    config = getattr(settings, 'GIG_SEARCH_CONFIG', 'simple')
+    vectors = Gigs.objects.filter(pk=OuterRef('pk')).annotate(vector=(
+        SearchVector('title', weight='A', config=config)
+        + SearchVector('service__name', 'service__category__name', weight='B', config=config)
+        + SearchVector('description', weight='C', config=config)
+    ))
+    Gigs.objects.update(search_vector=Subquery(vectors.values('vector')[:1]))
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm ships with contrib, which not every server has; search
+    # falls back to full-text only without it
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute("CREATE INDEX IF NOT EXISTS gig_title_trgm_idx ON gigs USING gin (title gin_trgm_ops)")
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS gig_title_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0007_gig_rating_avg_and_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gigs',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='gigs',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='gig_search_vector_idx'),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
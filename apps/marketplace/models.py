@@ -1,6 +1,7 @@
 from django.db import models
-from django.db.models import Avg
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 # Create your models here.
 
@@ -35,14 +36,41 @@ class Gigs(models.Model):
     is_active = models.BooleanField(default=True)
     image = models.ImageField(upload_to='gig_images/', blank=True, null=True)
     saved_by = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='saved_gigs', blank=True)
+    # Denormalized from active reviews, maintained by apps.reviews.signals
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+    # Maintained by apps.marketplace.signals, see apps.marketplace.search
+    search_vector = SearchVectorField(null=True, editable=False)
     class Meta:
         db_table = "gigs"
+        # One per GigListView sort, scoped to the active gigs of a service;
+        # the trailing id keeps pages stable between equal values
+        indexes = [
+            models.Index(fields=['service', 'price', 'id'], condition=models.Q(is_active=True), name='gig_service_price_idx'),
+            models.Index(fields=['service', '-created_at', '-id'], condition=models.Q(is_active=True), name='gig_service_recent_idx'),
+            models.Index(fields=['service', '-rating_avg', '-id'], condition=models.Q(is_active=True), name='gig_service_rating_idx'),
+            models.Index(fields=['service', 'delivery_time'], condition=models.Q(is_active=True), name='gig_service_delivery_idx'),
+            GinIndex(fields=['search_vector'], name='gig_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
     @property
     def average_rating(self):
-        return self.reviews.filter(is_active=True).aggregate(avg=Avg('rating'))['avg'] or 0
+        return self.rating_avg
     @property
     def reviews_count(self):
-        return self.reviews.filter(is_active=True).count()
\ No newline at end of file
+        return self.rating_count
+
+class GigRanking(models.Model):
+    """Bayesian-weighted rating score of a reviewed gig, maintained by apps.marketplace.ranking"""
+    gig = models.OneToOneField('Gigs', on_delete=models.CASCADE, primary_key=True, related_name='ranking')
+    score = models.FloatField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "gig_rankings"
+
+    def __str__(self):
+        return f"{self.gig_id}: {self.score:.3f}"
@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class GigSearchCursorPagination(CursorPagination):
+    """Pages through search results by relevance; the id breaks ties between equal ranks."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-rank', '-id')
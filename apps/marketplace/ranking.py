@@ -0,0 +1,92 @@
+"""
+Top-rated gig ranking.
+
+Each reviewed, active gig has a GigRanking row holding its Bayesian
+average: its reviews are blended with ``TOP_RATED_PRIOR_WEIGHT`` virtual
+reviews at the marketplace-wide mean, so a single 5-star review can't
+outrank a gig with hundreds of 4.8s. The score is computed from the stored
+rating_sum/rating_count, never from a join over reviews.
+
+Review changes re-score their gig after commit against the current mean;
+``refresh_gig_rankings`` re-scores every gig so the ones that weren't
+touched pick up the drift in the mean. Pages of the top-rated list are
+cached under a version key that every refresh bumps.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import FloatField, Sum, Value
+from django.db.models.functions import Cast
+
+from .models import GigRanking, Gigs
+
+RANKING_VERSION_KEY = 'top_rated_gigs:version'
+
+
+def marketplace_mean():
+    """Mean rating over all active gigs' reviews, or None if there are none."""
+    totals = Gigs.objects.filter(is_active=True).aggregate(
+        rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count'),
+    )
+    if not totals['rating_count']:
+        return None
+    return totals['rating_sum'] / totals['rating_count']
+
+
+def score_expression(mean, weight):
+    """(weight * mean + rating_sum) / (weight + rating_count)"""
+    return (
+        (Value(weight * mean) + Cast('rating_sum', FloatField()))
+        / (Value(float(weight)) + Cast('rating_count', FloatField()))
+    )
+
+
+def refresh_gig_rankings(gig_ids=None):
+    """Re-score the given gigs (or all of them); returns the number of rows written."""
+    rankings = GigRanking.objects.all()
+    gigs = Gigs.objects.filter(is_active=True, rating_count__gt=0)
+    if gig_ids is not None:
+        rankings = rankings.filter(gig_id__in=gig_ids)
+        gigs = gigs.filter(pk__in=gig_ids)
+
+    with transaction.atomic():
+        # Gigs that were deactivated or lost their last review drop out
+        rankings.exclude(gig__is_active=True, gig__rating_count__gt=0).delete()
+
+        mean = marketplace_mean()
+        rows = []
+        if mean is not None:
+            scores = gigs.annotate(ranking_score=score_expression(mean, settings.TOP_RATED_PRIOR_WEIGHT))
+            rows = [
+                GigRanking(gig_id=gig_id, score=score)
+                for gig_id, score in scores.values_list('pk', 'ranking_score').iterator()
+            ]
+            GigRanking.objects.bulk_create(
+                rows, batch_size=1000,
+                update_conflicts=True, unique_fields=['gig'], update_fields=['score', 'updated_at'],
+            )
+        transaction.on_commit(invalidate_top_rated_pages)
+    return len(rows)
+
+
+def schedule_ranking_refresh(gig_ids):
+    transaction.on_commit(lambda: refresh_gig_rankings(gig_ids))
+
+
+def ranking_version():
+    version = cache.get(RANKING_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(RANKING_VERSION_KEY, version, None)
+    return version
+
+
+def top_rated_page_key(query_string):
+    return f"top_rated_gigs:{ranking_version()}:{query_string}"
+
+
+def invalidate_top_rated_pages():
+    try:
+        cache.incr(RANKING_VERSION_KEY)
+    except ValueError:
+        cache.set(RANKING_VERSION_KEY, 2, None)
@@ -0,0 +1,66 @@
+"""
+Full-text gig search.
+
+Every gig stores a weighted ``search_vector`` (title A, service and
+category names B, description C) under a GIN index. It is rebuilt by the
+signals in apps.marketplace.signals whenever the gig's text, its service
+or its category changes, so searching never concatenates text per row.
+
+Where the pg_trgm extension is installed, titles are also matched by
+trigram word similarity through a GIN trigram index, so misspelled
+queries still find gigs. Without it, search is full-text only.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+
+from .models import Gigs
+
+
+def search_config():
+    return getattr(settings, 'GIG_SEARCH_CONFIG', 'simple')
+
+
+def search_vector_expression():
+    config = search_config()
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector('service__name', 'service__category__name', weight='B', config=config)
+        + SearchVector('description', weight='C', config=config)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored vectors of the gigs in queryset."""
+    # UPDATE can't join, so the vector is built in a correlated subquery
+    vectors = Gigs.objects.filter(pk=OuterRef('pk')).annotate(vector=search_vector_expression())
+    return queryset.update(search_vector=Subquery(vectors.values('vector')[:1]))
+
+
+# Probe results per database name, so the test database is probed on its own
+_trigram_support = {}
+
+
+def trigram_available():
+    name = connection.settings_dict['NAME']
+    if name not in _trigram_support:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_support[name] = cursor.fetchone() is not None
+    return _trigram_support[name]
+
+
+def search_gigs(queryset, text):
+    """Filter queryset to gigs matching text and annotate each with its ``rank``."""
+    query = SearchQuery(text, search_type='websearch', config=search_config())
+    matches = Q(search_vector=query)
+    rank = SearchRank(F('search_vector'), query)
+    if trigram_available():
+        matches |= Q(title__trigram_word_similar=text)
+        rank = rank + TrigramWordSimilarity(text, 'title')
+    # ts_rank is a real; as a double the cursor position survives the round trip
+    return queryset.filter(matches).annotate(rank=Cast(rank, FloatField()))
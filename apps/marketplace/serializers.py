@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from apps.accounts.serializers import UserSerializer
+from .fieldsets import SparseFieldsetSerializerMixin
 from .models import Categories, Services, Gigs
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -12,7 +13,7 @@ class ServiceSerializer(serializers.ModelSerializer):
         model = Services
         fields = ['id', 'name', 'category']
 
-class GigSerializer(serializers.ModelSerializer):
+class GigSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='seller.username', read_only=True)
     user_profile_picture = serializers.ImageField(source='seller.profile_picture', read_only=True)
     email = serializers.CharField(source='seller.email', read_only=True)
@@ -20,7 +21,7 @@ class GigSerializer(serializers.ModelSerializer):
     average_rating = serializers.FloatField( read_only=True)
     reviews_count = serializers.IntegerField( read_only=True)
     image = serializers.ImageField(required=False, allow_null=True) 
-    seller_id = serializers.IntegerField(source='seller.id', read_only=True) 
+    seller_id = serializers.IntegerField(read_only=True)
     service = serializers.CharField(source='service.name', read_only=True)
     
     class Meta:
@@ -33,6 +34,15 @@ class GigSerializer(serializers.ModelSerializer):
             'average_rating', 'reviews_count', 
             'image'
             ]  
+        # ?view=summary on list endpoints
+        summary_fields = [
+            'id', 'title', 'price', 'delivery_time', 'service', 'seller_id', 'username',
+            'user_profile_picture', 'average_rating', 'reviews_count', 'image',
+        ]
+        field_paths = {
+            'average_rating': ['rating_avg'],
+            'reviews_count': ['rating_count'],
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -55,3 +65,15 @@ class GigSaveToggleSerializer(serializers.Serializer):
         if not Gigs.objects.filter(id=value).exists():
             raise serializers.ValidationError("Gig not found.")
         return value
+
+
+class GigListFilterSerializer(serializers.Serializer):
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    max_delivery_time = serializers.IntegerField(min_value=1, required=False)
+    min_rating = serializers.FloatField(min_value=0, max_value=5, required=False)
+
+    def validate(self, data):
+        if 'min_price' in data and 'max_price' in data and data['min_price'] > data['max_price']:
+            raise serializers.ValidationError("min_price cannot be greater than max_price.")
+        return data
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Categories, Gigs, Services
+from .search import update_search_vectors
+
+SEARCHED_FIELDS = {'title', 'description', 'service', 'service_id'}
+
+
+@receiver(post_save, sender=Gigs)
+def refresh_gig_search_vector(sender, instance, created, update_fields=None, **kwargs):
+    # Saves that only touch flags or counters keep the stored vector
+    if update_fields is not None and not SEARCHED_FIELDS & set(update_fields):
+        return
+    update_search_vectors(Gigs.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Services)
+def refresh_service_search_vectors(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(Gigs.objects.filter(service=instance))
+
+
+@receiver(post_save, sender=Categories)
+def refresh_category_search_vectors(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(Gigs.objects.filter(service__category=instance))
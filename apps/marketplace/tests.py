@@ -1,3 +1,253 @@
-from django.test import TestCase
+import os
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.orders.models import OrderStatus
+from apps.payment.tests import MarketplaceFixtureMixin
+from apps.reviews.models import Review
+from .models import Categories, GigRanking, Gigs, Services
+from .ranking import refresh_gig_rankings
+from .search import trigram_available
+
+User = get_user_model()
+
+
+class SparseFieldsetTests(MarketplaceFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_marketplace()
+        self.url = f'/api/services/{self.gig.service_id}/gigs/'
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        select = next(q['sql'] for q in queries if 'FROM "gigs"' in q['sql'] and 'COUNT(' not in q['sql'])
+        return response.data['results'], select
+
+    def test_fields_trims_response_and_columns(self):
+        results, select = self.get(self.url + '?fields=id,title,price,username')
+        self.assertEqual(set(results[0]), {'id', 'title', 'price', 'username'})
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('"email"', select)
+        self.assertIn('"username"', select)
+
+    def test_unknown_fields_are_ignored(self):
+        results, _ = self.get(self.url + '?fields=id,nope')
+        self.assertEqual(set(results[0]), {'id'})
+
+    def test_only_unknown_fields_returns_every_field(self):
+        results, _ = self.get(self.url + '?fields=nope')
+        self.assertIn('description', results[0])
+
+    def test_admin_fields_can_be_selected(self):
+        admin = User.objects.create(username='admin', email='admin@example.com', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/admin/gigs/?fields=id,is_active')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'is_active'})
+
+    def test_summary_view(self):
+        results, select = self.get(self.url + '?view=summary')
+        self.assertNotIn('description', results[0])
+        self.assertNotIn('"description"', select)
+        gig = next(row for row in results if row['id'] == self.gig.id)
+        self.assertEqual(gig['username'], 'seller')
+        self.assertEqual(gig['service'], 'Logo')
+        self.assertEqual(gig['seller_id'], self.seller.id)
+
+    def test_default_returns_every_field(self):
+        results, _ = self.get(self.url)
+        self.assertIn('description', results[0])
+        self.assertIn('email', results[0])
+
+
+class TopRatedRankingTests(MarketplaceFixtureMixin, APITestCase):
+    url = '/api/gigs/top-rated/'
+
+    def setUp(self):
+        cache.clear()
+        self.create_marketplace()
+        self.weak_gig = Gigs.objects.create(
+            seller=self.seller, service=self.gig.service, title='Banner', description='A banner', price=20, delivery_time=1
+        )
+        # One 5-star review against twenty averaging 4.8, plus a 3-star gig
+        Gigs.objects.filter(pk=self.gig.pk).update(rating_sum=5, rating_count=1)
+        Gigs.objects.filter(pk=self.other_gig.pk).update(rating_sum=96, rating_count=20)
+        Gigs.objects.filter(pk=self.weak_gig.pk).update(rating_sum=30, rating_count=10)
+        refresh_gig_rankings()
+
+    def ranked_ids(self):
+        return [row['id'] for row in self.client.get(self.url).data['results']]
+
+    def test_single_review_does_not_dominate(self):
+        scores = dict(GigRanking.objects.values_list('gig_id', 'score'))
+        self.assertGreater(scores[self.other_gig.pk], scores[self.gig.pk])
+        self.assertLess(scores[self.weak_gig.pk], 3.5)
+        self.assertEqual(self.ranked_ids(), [self.other_gig.pk, self.gig.pk])
+
+    def test_pages_are_cached_until_refresh(self):
+        self.ranked_ids()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.ranked_ids(), [self.other_gig.pk, self.gig.pk])
+
+        Gigs.objects.filter(pk=self.other_gig.pk).update(is_active=False)
+        self.assertEqual(self.ranked_ids(), [self.other_gig.pk, self.gig.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_gig_rankings([self.other_gig.pk])
+        self.assertFalse(GigRanking.objects.filter(gig=self.other_gig).exists())
+        self.assertEqual(self.ranked_ids(), [self.gig.pk])
+
+    def test_new_review_rescores_its_gig(self):
+        order = self.order(self.weak_gig, OrderStatus.COMPLETED)
+        before = GigRanking.objects.get(gig=self.weak_gig).score
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                order=order, gig=self.weak_gig, reviewer=self.buyer, seller=self.seller, rating=5, comment='Great'
+            )
+        self.assertGreater(GigRanking.objects.get(gig=self.weak_gig).score, before)
+
+
+class GigListIndexTests(MarketplaceFixtureMixin, APITestCase):
+    """
+    EXPLAINs the gig list page query over a seeded table. Set
+    GIG_EXPLAIN_ROWS=1000000 to check the plans at production scale.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rows = int(os.environ.get('GIG_EXPLAIN_ROWS', 20000))
+        services = Services.objects.bulk_create([
+            Services(name=f'Service {i}', category=Categories.objects.create(name=f'Category {i}'))
+            for i in range(50)
+        ])
+        cls.service = services[0]
+        seller = User.objects.create(username='bulk-seller', email='bulk-seller@example.com')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO gigs (seller_id, service_id, title, description, price, delivery_time,
+                                  created_at, is_active, rating_sum, rating_count, rating_avg)
+                SELECT %s, (%s::bigint[])[1 + n %% 50],
+                       'Gig ' || n, 'Lorem ipsum', round((random() * 500)::numeric, 2),
+                       1 + (random() * 29)::int, now() - random() * interval '365 days',
+                       n %% 7 <> 0, 0, 0, round((random() * 5)::numeric, 2)
+                FROM generate_series(1, %s) AS n
+                """,
+                [seller.pk, [service.pk for service in services], rows],
+            )
+            cursor.execute('ANALYZE gigs')
+
+    def explain(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/services/{self.service.pk}/gigs/?{query}')
+        self.assertEqual(response.status_code, 200)
+        sql = next(q['sql'] for q in queries if 'FROM "gigs"' in q['sql'] and 'COUNT(' not in q['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_sorts_and_filters_use_the_list_indexes(self):
+        for query, index, presorted in (
+            ('sort=lowest_price', 'gig_service_price_idx', True),
+            ('sort=highest_price&min_price=100&max_price=200', 'gig_service_price_idx', True),
+            ('sort=most_recent', 'gig_service_recent_idx', True),
+            ('sort=highest_rating&min_rating=4', 'gig_service_rating_idx', True),
+            # Either index works; the planner may sort the few fast-delivery rows
+            ('sort=lowest_price&max_delivery_time=3', 'gig_service_', False),
+        ):
+            with self.subTest(query=query):
+                plan = self.explain(query)
+                self.assertIn(index, plan)
+                self.assertNotIn('Seq Scan on gigs', plan)
+                if presorted:
+                    self.assertNotRegex(plan, r'Sort\s')
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(f'/api/services/{self.service.pk}/gigs/?min_price=50&max_price=10')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/api/services/{self.service.pk}/gigs/?min_rating=9')
+        self.assertEqual(response.status_code, 400)
+
+
+class GigSearchTests(MarketplaceFixtureMixin, APITestCase):
+    url = '/api/gigs/search/'
+
+    def setUp(self):
+        self.create_marketplace()
+        service = self.gig.service
+        self.photo = Gigs.objects.create(
+            seller=self.seller, service=service, title='Wedding photography',
+            description='Full day coverage', price=300, delivery_time=7,
+        )
+        self.retouch = Gigs.objects.create(
+            seller=self.seller, service=service, title='Portrait retouching',
+            description='I edit your photography sessions', price=50, delivery_time=2,
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('photography'), [self.photo.pk, self.retouch.pk])
+
+    def test_matches_service_and_category_names(self):
+        self.assertEqual(set(self.search('design')), {self.gig.pk, self.other_gig.pk, self.photo.pk, self.retouch.pk})
+
+    def test_vectors_follow_edits(self):
+        self.other_gig.title = 'Mascot'
+        self.other_gig.save()
+        self.assertEqual(self.search('mascot'), [self.other_gig.pk])
+
+        category = self.gig.service.category
+        category.name = 'Branding'
+        category.save()
+        self.assertEqual(len(self.search('branding')), 4)
+
+        self.photo.is_active = False
+        self.photo.save(update_fields=['is_active'])
+        self.assertEqual(self.search('photography'), [self.retouch.pk])
+
+    def test_cursor_pagination(self):
+        response = self.client.get(self.url, {'q': 'photography', 'page_size': 1})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.photo.pk])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.retouch.pk])
+        self.assertIsNone(response.data['next'])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    def test_search_uses_the_vector_index(self):
+        # Seed enough unrelated gigs, with fresh statistics, that the planner
+        # picks the index on its own whatever other cases analyzed before
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO gigs (seller_id, service_id, title, description, price, delivery_time,
+                                  created_at, is_active, rating_sum, rating_count, rating_avg, search_vector)
+                SELECT %s, %s, 'Gig ' || n, 'Lorem ipsum', 10, 1, now(), true, 0, 0, 0,
+                       to_tsvector('simple', 'gig ' || n || ' lorem ipsum')
+                FROM generate_series(1, 5000) AS n
+                """,
+                [self.seller.pk, self.gig.service_id],
+            )
+            # Move the inserts out of GIN's pending list, which the planner costs as a scan
+            cursor.execute("SELECT gin_clean_pending_list('gig_search_vector_idx')")
+            cursor.execute('ANALYZE gigs')
+        with CaptureQueriesContext(connection) as queries:
+            self.search('photography')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + queries[-1]['sql'])
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('gig_search_vector_idx', plan)
+        self.assertRegex(plan, r'(Index|Recheck) Cond: .*search_vector"? @@')
+
+    def test_typos_match_by_trigram(self):
+        if not trigram_available():
+            self.skipTest("pg_trgm is not installed")
+        self.assertIn(self.photo.pk, self.search('photgraphy'))
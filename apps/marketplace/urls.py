@@ -3,6 +3,7 @@ from .views import (
     CategoryListView,
     ServiceListView,
     GigListView,
+    GigSearchView,
     GigCreateView,
     GigDetailView,
     MyGigsListView,
@@ -19,6 +20,7 @@ urlpatterns = [
     path('categories/<int:category_id>/services/', ServiceListView.as_view(), name='service-list'),
     path('services/<int:service_id>/gigs/', GigListView.as_view(), name='gig-list'),
     path('gigs/top-rated/', TopRatedGigListView.as_view(), name='top-rated-gigs'),
+    path('gigs/search/', GigSearchView.as_view(), name='gig-search'),
     path('gigs/create/', GigCreateView.as_view(), name='gig-create'),
     path('gigs/<int:pk>/', GigDetailView.as_view(), name='gig-detail'),
     path('my-gigs/', MyGigsListView.as_view(), name='my-gigs'),
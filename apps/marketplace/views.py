@@ -1,16 +1,25 @@
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAdminUser
+from apps.accounts.authentication import ClaimsJWTAuthentication
+from apps.accounts.models import UserRoles
+from .fieldsets import SparseFieldsetMixin
 from .models import Categories, Services, Gigs
+from .pagination import GigSearchCursorPagination
+from .ranking import refresh_gig_rankings, top_rated_page_key
+from .search import search_gigs
 from .serializers import (
     CategorySerializer, 
     ServiceSerializer,
     GigSerializer,
     GigCreateSerializer,
+    GigListFilterSerializer,
     GigSaveToggleSerializer
 )
-from django.db.models import Avg
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Value, When
 from rest_framework.response import Response
 
 # Create your views here.
@@ -28,34 +37,64 @@ class ServiceListView(generics.ListAPIView):
         category_id = self.kwargs['category_id']
         return Services.objects.filter(category_id=category_id)
 
-class GigListView(generics.ListAPIView):
+class GigListView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = GigSerializer
     permission_classes = [permissions.AllowAny]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         service_id = self.kwargs['service_id']
-        queryset = Gigs.objects.filter(service_id=service_id, is_active=True)
-
+        queryset = Gigs.objects.filter(service_id=service_id, is_active=True).select_related('service', 'seller')
+
+        filters = GigListFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        filters = filters.validated_data
+        if 'min_price' in filters:
+            queryset = queryset.filter(price__gte=filters['min_price'])
+        if 'max_price' in filters:
+            queryset = queryset.filter(price__lte=filters['max_price'])
+        if 'max_delivery_time' in filters:
+            queryset = queryset.filter(delivery_time__lte=filters['max_delivery_time'])
+        if 'min_rating' in filters:
+            queryset = queryset.filter(rating_avg__gte=filters['min_rating'])
+
+        # Each sort matches one of the partial (service, ..., id) indexes on Gigs
         sort = self.request.query_params.get('sort')
 
         if sort == 'highest_rating':
-            queryset = queryset.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
+            queryset = queryset.order_by('-rating_avg', '-id')
         elif sort == 'lowest_price':
-            queryset = queryset.order_by('price')
+            queryset = queryset.order_by('price', 'id')
         elif sort == 'highest_price':
-            queryset = queryset.order_by('-price')
+            queryset = queryset.order_by('-price', '-id')
         elif sort == 'most_recent':
-            queryset = queryset.order_by('-created_at')
+            queryset = queryset.order_by('-created_at', '-id')
 
         return queryset
 
+class GigSearchView(SparseFieldsetMixin, generics.ListAPIView):
+    """Ranked full-text search over active gigs: ?q=<text>"""
+    serializer_class = GigSerializer
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = GigSearchCursorPagination
+
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This query parameter is required.'})
+        queryset = Gigs.objects.filter(is_active=True).select_related('service', 'seller')
+        return search_gigs(queryset, text)
+
 class GigCreateView(generics.CreateAPIView):
     queryset = Gigs.objects.all()
     serializer_class = GigCreateSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def perform_create(self, serializer):
-        if self.request.user.role and self.request.user.role.role_name.lower() == 'seller':
+        role_id = self.request.user.role_id
+        role = UserRoles.objects.get_cached(pk=role_id) if role_id else None
+        if role and role.role_name.lower() == 'seller':
              serializer.save(seller=self.request.user)
         else:
             raise PermissionDenied("Only Seller can post a gig.")
@@ -83,38 +122,41 @@ class GigDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Soft delete instead of actual deletion
         if instance.seller == self.request.user:
             instance.is_active = False
-            instance.save()
+            instance.save(update_fields=['is_active'])
+            refresh_gig_rankings([instance.pk])
         else:
             raise PermissionDenied("You don't have permission to delete this gig.")
         
-class MyGigsListView(generics.ListAPIView):
+class MyGigsListView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = GigSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         # Return only the authenticated seller's active gigs
         return Gigs.objects.filter(
-            seller=self.request.user,
+            seller_id=self.request.user.id,
             is_active=True
         ).select_related('service', 'seller')
     
 
-class MyFilteredGigsListView(generics.ListAPIView):
+class MyFilteredGigsListView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = GigSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         """Returns seller's gigs filtered by service ID"""
         service_id = self.kwargs.get('service_id')  # From URL
         
         return Gigs.objects.filter(
-            seller=self.request.user,
+            seller_id=self.request.user.id,
             service_id=service_id,
             is_active=True
         ).select_related('service', 'seller')
 
 
-class AdminGigListView(generics.ListAPIView):
+class AdminGigListView(SparseFieldsetMixin, generics.ListAPIView):
     """
     Admin-only view to list ALL gigs (including inactive ones)
     """
@@ -124,10 +166,9 @@ class AdminGigListView(generics.ListAPIView):
 
     def get_serializer_context(self):
         """Adds extra context for the serializer"""
-        return {
-            'show_admin_fields': True,  # Flag to show sensitive fields to admin
-            'request': self.request
-        }
+        context = super().get_serializer_context()
+        context['show_admin_fields'] = True  # Flag to show sensitive fields to admin
+        return context
     
 class AdminToggleGigStatusView(generics.UpdateAPIView):
     """
@@ -136,34 +177,44 @@ class AdminToggleGigStatusView(generics.UpdateAPIView):
     permission_classes = [IsAdminUser]
 
     def patch(self, request, pk):
-        try:
-            gig = Gigs.objects.get(pk=pk)
-        except Gigs.DoesNotExist:
+        gigs = Gigs.objects.filter(pk=pk)
+        # Flip the flag in the database so concurrent toggles can't lose an update
+        toggled = gigs.update(is_active=Case(When(is_active=True, then=Value(False)), default=Value(True)))
+        if not toggled:
             return Response({'detail': 'Gig not found.'}, status=status.HTTP_404_NOT_FOUND)
+        refresh_gig_rankings([pk])
 
-        gig.is_active = not gig.is_active
-        gig.save()
+        gig = gigs.values('id', 'title', 'is_active').get()
         return Response({
-            'id': gig.id,
-            'title': gig.title,
-            'is_active': gig.is_active,
-            'message': f'Gig has been {"activated" if gig.is_active else "deactivated"} successfully.'
+            'id': gig['id'],
+            'title': gig['title'],
+            'is_active': gig['is_active'],
+            'message': f'Gig has been {"activated" if gig["is_active"] else "deactivated"} successfully.'
         })
 
 
 # Top rated gigs
-class TopRatedGigListView(generics.ListAPIView):
+class TopRatedGigListView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = GigSerializer
     permission_classes = [permissions.AllowAny]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get_queryset(self):
         return (
-            Gigs.objects.filter(is_active=True)
-            .annotate(avg_rating=Avg('reviews__rating'))
-            .filter(avg_rating__gte=3.5)  
-            .order_by('-avg_rating')
+            Gigs.objects.filter(is_active=True, ranking__score__gte=settings.TOP_RATED_MIN_SCORE)
+            .select_related('service', 'seller')
+            .order_by('-ranking__score', '-rating_count', 'pk')
         )
 
+    def list(self, request, *args, **kwargs):
+        # Pages only change when the ranking is refreshed, which bumps the key version
+        key = top_rated_page_key(request.query_params.urlencode())
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, settings.TOP_RATED_CACHE_TTL)
+        return Response(data)
+
 class ToggleSavedGigView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -182,12 +233,13 @@ class ToggleSavedGigView(APIView):
             return Response({'message': 'Gig saved'}, status=status.HTTP_200_OK)
         
 
-class SavedGigListView(generics.ListAPIView):
+class SavedGigListView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = GigSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get_queryset(self):
-        return Gigs.objects.filter(saved_by=self.request.user, is_active=True)
+        return Gigs.objects.filter(saved_by=self.request.user.id, is_active=True).select_related('service', 'seller')
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
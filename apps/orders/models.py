@@ -1,11 +1,24 @@
 from django.db import models
 from django.conf import settings
 from apps.marketplace.models import Gigs
+from apps.accounts.managers import LookupTableManager
 
 class OrderStatus(models.Model):
     """Tracks possible order statuses (In Progress, Delivered, Completed, etc.)"""
+    IN_PROGRESS = "In Progress"
+    DELIVERED = "Delivered"
+    COMPLETED = "Completed"
+    CANCELLED = "Cancelled"
+    REVISION = "Revision"
+
+    # Groupings used by the buyer/seller order lists
+    ACTIVE = (IN_PROGRESS, DELIVERED)
+    FINISHED = (COMPLETED, CANCELLED)
+
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
+
+    objects = LookupTableManager('name')
     
     class Meta:
         verbose_name_plural = "Order Statuses"
@@ -14,6 +27,16 @@ class OrderStatus(models.Model):
     def __str__(self):
         return self.name
 
+class OrderQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Everything OrderSerializer reads, in the same query: status, buyer,
+        gig and its seller, and the optional review (LEFT JOIN), so a page
+        of orders costs one query however many rows it has.
+        """
+        return self.select_related('status', 'buyer', 'gig__seller', 'review')
+
+
 class Order(models.Model):
     """Main order model connecting buyers, sellers and gigs"""
     buyer = models.ForeignKey(
@@ -45,6 +68,8 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         db_table = "orders"
         ordering = ['-created_at']
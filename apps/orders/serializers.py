@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Order, OrderStatus
+from apps.marketplace.fieldsets import SparseFieldsetSerializerMixin
 from apps.marketplace.serializers import GigSerializer
 from apps.reviews.models import Review
 
@@ -9,12 +10,12 @@ class OrderStatusSerializer(serializers.ModelSerializer):
         model = OrderStatus
         fields = ['id', 'name', 'description']
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     order_status = serializers.CharField(source='status.name', read_only=True)
     buyer_username = serializers.CharField(source='buyer.username', read_only=True)
-    buyer_id = serializers.CharField(source='buyer.id', read_only=True)
+    buyer_id = serializers.CharField(read_only=True)
     seller_username = serializers.CharField(source='gig.seller.username', read_only=True)
-    seller_id = serializers.CharField(source='gig.seller.id', read_only=True)
+    seller_id = serializers.CharField(source='gig.seller_id', read_only=True)
     gig_title = serializers.CharField(source='gig.title', read_only=True)
     gig_description = serializers.CharField(source='gig.description', read_only=True)
     gig_price = serializers.CharField(source='gig.price', read_only=True)
@@ -42,6 +43,16 @@ class OrderSerializer(serializers.ModelSerializer):
             'is_paid', 'lahza_transaction_id',
             'platform_fee', 'seller_payout', 'payout_sent'
         ]
+        # ?view=summary on list endpoints
+        summary_fields = [
+            'id', 'buyer_username', 'seller_username', 'gig', 'gig_title', 'gig_price',
+            'order_status', 'created_at', 'delivery_date', 'is_paid', 'has_review', 'rating',
+        ]
+        field_paths = {
+            'has_review': ['review__id'],
+            'rating': ['review__rating'],
+            'comment': ['review__comment'],
+        }
 
     def get_has_review(self, obj):
         return hasattr(obj, 'review')
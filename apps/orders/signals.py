@@ -0,0 +1,7 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import OrderStatus
+
+@receiver([post_save, post_delete], sender=OrderStatus)
+def clear_status_cache(sender, **kwargs):
+    OrderStatus.objects.clear_cache()
@@ -1,3 +1,119 @@
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import UserRoles
+from apps.payment.tests import MarketplaceFixtureMixin
+from apps.reviews.models import Review
+from .models import OrderStatus
+
+
+class LookupTableCacheTests(TestCase):
+    def setUp(self):
+        OrderStatus.objects.clear_cache()
+        self.completed = OrderStatus.objects.create(name=OrderStatus.COMPLETED)
+        self.delivered = OrderStatus.objects.create(name=OrderStatus.DELIVERED)
+
+    def test_statuses_are_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED), self.completed)
+            self.assertEqual(OrderStatus.objects.get_cached(pk=self.delivered.pk), self.delivered)
+            self.assertEqual(OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED), self.completed)
+
+    def test_unknown_status_raises_does_not_exist(self):
+        with self.assertRaises(OrderStatus.DoesNotExist):
+            OrderStatus.objects.get_cached(name="Unknown")
+
+    def test_saving_a_status_clears_the_cache(self):
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        self.completed.description = "Buyer accepted the delivery"
+        self.completed.save()
+        with self.assertNumQueries(1):
+            status = OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        self.assertEqual(status.description, "Buyer accepted the delivery")
+
+    def test_rows_added_behind_the_cache_are_found(self):
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        # bulk_create sends no post_save, as with a row added by another process
+        OrderStatus.objects.bulk_create([OrderStatus(name=OrderStatus.REVISION)])
+        with self.assertNumQueries(1):
+            revision = OrderStatus.objects.get_cached(name=OrderStatus.REVISION)
+            self.assertEqual(OrderStatus.objects.cached_ids([OrderStatus.REVISION]), [revision.pk])
+
+    def test_cached_ids_skip_missing_names(self):
+        self.assertEqual(
+            OrderStatus.objects.cached_ids([OrderStatus.COMPLETED, OrderStatus.CANCELLED, OrderStatus.DELIVERED]),
+            [self.completed.pk, self.delivered.pk],
+        )
+
+    def test_roles_are_cached_by_pk(self):
+        role = UserRoles.objects.create(role_name="Seller")
+        UserRoles.objects.get_cached(pk=role.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(UserRoles.objects.get_cached(pk=role.pk).role_name, "Seller")
+
+
+class OrderListQueryTests(MarketplaceFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_marketplace()
+        orders = [self.order(self.gig, OrderStatus.COMPLETED) for _ in range(10)]
+        Review.objects.bulk_create([
+            Review(order=order, gig=self.gig, reviewer=self.buyer, seller=self.seller, rating=4, comment='Nice')
+            for order in orders[::2]
+        ])
+
+    def queries_for_page(self, user, url, page_size):
+        self.client.force_authenticate(user=user)
+        with mock.patch.object(PageNumberPagination, 'page_size', page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(queries), response.data['results']
+
+    def test_queries_do_not_grow_with_page_size(self):
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        for user, url in ((self.buyer, '/api/orders/my-orders/completed/'),
+                          (self.seller, '/api/orders/seller-orders/completed/')):
+            small, _ = self.queries_for_page(user, url, 2)
+            large, results = self.queries_for_page(user, url, 10)
+            self.assertEqual(small, large)
+            self.assertEqual(sum(row['has_review'] for row in results), 5)
+            self.assertEqual({row['rating'] for row in results}, {4, None})
+
+    def test_summary_view_skips_gig_description(self):
+        self.client.force_authenticate(user=self.buyer)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/orders/my-orders/completed/?view=summary')
+        select = next(q['sql'] for q in queries if 'FROM "orders"' in q['sql'] and 'COUNT(' not in q['sql'])
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('"requirements"', select)
+        row = response.data['results'][0]
+        self.assertNotIn('gig_description', row)
+        self.assertEqual(row['seller_username'], 'seller')
+        self.assertEqual(row['gig_title'], 'Logo')
+
+    def test_fields_on_order_list(self):
+        self.client.force_authenticate(user=self.seller)
+        response = self.client.get('/api/orders/seller-orders/completed/?fields=id,rating,buyer_id')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'rating', 'buyer_id'})
+        self.assertEqual({row['buyer_id'] for row in response.data['results']}, {str(self.buyer.id)})
+
+
+class OrderStatusUpdateTests(MarketplaceFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_marketplace()
+        self.order_obj = self.order(self.gig, OrderStatus.IN_PROGRESS)
+        self.url = f'/api/orders/{self.order_obj.pk}/'
+        self.client.force_authenticate(user=self.seller)
 
-# Create your tests here.
+    def test_seller_can_only_mark_delivered(self):
+        response = self.client.patch(self.url, {'status': self.statuses[OrderStatus.COMPLETED].pk})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.patch(self.url, {'status': self.statuses[OrderStatus.DELIVERED].pk})
+        self.assertEqual(response.status_code, 200)
+        self.order_obj.refresh_from_db()
+        self.assertEqual(self.order_obj.status.name, OrderStatus.DELIVERED)
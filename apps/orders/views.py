@@ -1,11 +1,13 @@
+from django.db import transaction
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, NotFound
 from rest_framework.views import APIView
 from apps.communications.notification.utils import notify_user
+from apps.accounts.authentication import ClaimsJWTAuthentication
+from apps.payment.fees import order_fees
 
-from decimal import Decimal
-
+from apps.marketplace.fieldsets import SparseFieldsetMixin
 from .models import Order, OrderStatus
 from .serializers import (
     OrderSerializer,
@@ -29,24 +31,24 @@ class OrderCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def perform_create(self, serializer):
-        in_progress_status = OrderStatus.objects.get(name='In Progress')
+        in_progress_status = OrderStatus.objects.get_cached(name=OrderStatus.IN_PROGRESS)
         serializer.save(
             buyer=self.request.user,
             status=in_progress_status
         )
 
-class OrderListView(generics.ListAPIView):
+class OrderListView(SparseFieldsetMixin, generics.ListAPIView):
     """Endpoint to list all orders (with filters)"""
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Order.objects.select_related('gig', 'status', 'buyer', 'gig__seller').order_by('id')
+    queryset = Order.objects.with_related().order_by('id')
     
     
  
 
 class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Endpoint for order details and updates"""
-    queryset = Order.objects.all()
+    queryset = Order.objects.with_related()
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -62,9 +64,7 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
 
         if user == order.gig.seller:
             if 'status' in data:
-                status_id = data['status'].id
-                allowed_status = 2
-                if status_id != allowed_status:
+                if data['status'].name != OrderStatus.DELIVERED:
                     raise PermissionDenied("Seller can only mark status as Delivered or Cancelled.")   
                 notify_user(
                     user=order.buyer,
@@ -79,7 +79,7 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
                 raise PermissionDenied("Buyers can only update requirements.")
 
             if 'requirements' in data and data['requirements'] != order.requirements:
-                revision_status = OrderStatus.objects.get(id = 5)
+                revision_status = OrderStatus.objects.get_cached(name=OrderStatus.REVISION)
                 serializer.save(status=revision_status)
             else:
                 serializer.save()
@@ -91,96 +91,101 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Soft delete
         if self.request.user == instance.buyer or self.request.user == instance.gig.seller or self.request.user.id == 1:
             instance.is_active = False
-            instance.status = OrderStatus.objects.get(id=4)
-            instance.save()
+            instance.status = OrderStatus.objects.get_cached(name=OrderStatus.CANCELLED)
+            instance.save(update_fields=['is_active', 'status', 'updated_at'])
         else:
             raise PermissionDenied("You don't have permission to delete this order.")
 
-class BuyerOrderActiveListView(generics.ListAPIView):
+class BuyerOrderActiveListView(SparseFieldsetMixin, generics.ListAPIView):
     """Endpoint for a seller to see all orders for their gigs"""
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         return Order.objects.filter(
-            buyer=self.request.user,
+            buyer_id=self.request.user.id,
             is_active=True,
-            status__in=[1, 2]
-        ).select_related('gig', 'status', 'buyer')
+            status__in=OrderStatus.objects.cached_ids(OrderStatus.ACTIVE)
+        ).with_related()
     
 
-class BuyerOrderCompletedListView(generics.ListAPIView):
+class BuyerOrderCompletedListView(SparseFieldsetMixin, generics.ListAPIView):
     """Endpoint for a seller to see all orders for their gigs"""
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         return Order.objects.filter(
-            buyer=self.request.user,
-            status__in=[3, 4]
+            buyer_id=self.request.user.id,
+            status__in=OrderStatus.objects.cached_ids(OrderStatus.FINISHED)
 
-        ).select_related('gig', 'status', 'buyer')
+        ).with_related()
 
 
 
-class SellerOrderActiveListView(generics.ListAPIView):
+class SellerOrderActiveListView(SparseFieldsetMixin, generics.ListAPIView):
     """Endpoint for a seller to see all orders for their gigs"""
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         return Order.objects.filter(
-            gig__seller=self.request.user,
+            gig__seller_id=self.request.user.id,
             is_active=True,
-            status__in=[1, 2]
-        ).select_related('gig', 'status', 'buyer')
+            status__in=OrderStatus.objects.cached_ids(OrderStatus.ACTIVE)
+        ).with_related()
     
 
-class SellerOrderCompletedListView(generics.ListAPIView):
+class SellerOrderCompletedListView(SparseFieldsetMixin, generics.ListAPIView):
     """Endpoint for a seller to see all orders for their gigs"""
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         return Order.objects.filter(
-            gig__seller=self.request.user,
-            status__in=[3, 4]
+            gig__seller_id=self.request.user.id,
+            status__in=OrderStatus.objects.cached_ids(OrderStatus.FINISHED)
 
-        ).select_related('gig', 'status', 'buyer')
+        ).with_related()
     
 
 class MarkOrderCompletedView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        completed_status = OrderStatus.objects.get(name="Completed")
-        try:
-            order = Order.objects.select_related('gig__seller').get(pk=pk, is_active=True)
-        except Order.DoesNotExist:
-            raise NotFound("Order not found.")
-
-        if request.user != order.buyer:
-            raise PermissionDenied("Only the buyer can complete this order.")
-
-        if not order.is_paid:
-            return Response({"detail": "Order is not paid yet."}, status=400)
+        completed_status = OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        with transaction.atomic():
+            # Lock the order so a concurrent completion (or auto_release_payouts)
+            # sees this one's result instead of completing it a second time
+            try:
+                order = (
+                    Order.objects.select_related('gig__seller', 'gig__service')
+                    .select_for_update(of=('self',))
+                    .get(pk=pk, is_active=True)
+                )
+            except Order.DoesNotExist:
+                raise NotFound("Order not found.")
 
-        if order.status == completed_status:
-            return Response({"detail": "Order already marked as completed."}, status=400)
+            if request.user != order.buyer:
+                raise PermissionDenied("Only the buyer can complete this order.")
 
-        gig_price = order.gig.price
+            if not order.is_paid:
+                return Response({"detail": "Order is not paid yet."}, status=400)
 
-        lahza_fee = gig_price * Decimal('0.025')
-        after_lahza = gig_price - lahza_fee
+            if order.status_id == completed_status.id:
+                return Response({"detail": "Order already marked as completed."}, status=400)
 
-        platform_fee = after_lahza * Decimal('0.075')
-        seller_payout = after_lahza - platform_fee
+            fees = order_fees(order)
 
-        order.status = completed_status
-        order.platform_fee = round(platform_fee, 2)
-        order.seller_payout = round(seller_payout, 2)
-        order.payout_sent = False
-        order.save()
+            order.status = completed_status
+            order.platform_fee = fees.platform_fee
+            order.seller_payout = fees.seller_payout
+            order.payout_sent = False
+            order.save(update_fields=['status', 'platform_fee', 'seller_payout', 'payout_sent', 'updated_at'])
 
         notify_user(
                     user=order.gig.seller,
@@ -191,7 +196,7 @@ class MarkOrderCompletedView(APIView):
 
         return Response({
             "detail": "Order marked as completed.",
-            "lahza_fee": round(lahza_fee, 2),
+            "lahza_fee": fees.lahza_fee,
             "platform_fee": order.platform_fee,
             "seller_payout": order.seller_payout
         }, status=200)
\ No newline at end of file
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+
+from apps.orders.models import Order, OrderStatus
+from .models import SellerBalance, WithdrawalRequest
+
+ORDER_BALANCE_FIELDS = ('total_earned', 'held', 'available', 'pending_payout')
+BALANCE_FIELDS = ORDER_BALANCE_FIELDS + ('withdrawn',)
+
+
+def earning_status_ids():
+    return (
+        OrderStatus.objects.get_cached(name=OrderStatus.IN_PROGRESS).id,
+        OrderStatus.objects.get_cached(name=OrderStatus.DELIVERED).id,
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED).id,
+    )
+
+
+def compute_seller_balances(sellers=None):
+    """
+    Seller balances recomputed from the orders and payment tables, using one
+    conditional-aggregation query over orders and one over withdrawals.
+
+    total_earned:   price of every in-progress, delivered or completed order
+    held:           paid orders still in progress or delivered
+    available:      paid, completed orders whose payout hasn't been sent
+    pending_payout: seller_payout of completed orders not paid out yet
+    withdrawn:      amount of all withdrawal requests
+
+    Returns {seller_id: {field: Decimal}} for sellers with any activity.
+    """
+    in_progress, delivered, completed = earning_status_ids()
+    zero = Decimal('0')
+
+    orders = Order.objects.filter(status__in=[in_progress, delivered, completed])
+    withdrawals = WithdrawalRequest.objects.all()
+    if sellers is not None:
+        orders = orders.filter(gig__seller__in=sellers)
+        withdrawals = withdrawals.filter(seller__in=sellers)
+
+    rows = orders.order_by().values('gig__seller').annotate(
+        total_earned=Sum('gig__price', default=zero),
+        held=Sum(
+            'gig__price', default=zero,
+            filter=Q(status__in=[in_progress, delivered], is_paid=True),
+        ),
+        available=Sum(
+            'gig__price', default=zero,
+            filter=Q(status=completed, is_paid=True, payout_sent=False),
+        ),
+        pending_payout=Sum(
+            'seller_payout', default=zero,
+            filter=Q(status=completed, payout_sent=False),
+        ),
+    )
+
+    balances = {}
+    for row in rows:
+        seller_id = row.pop('gig__seller')
+        balances[seller_id] = dict(row, withdrawn=zero)
+    for row in withdrawals.order_by().values('seller').annotate(withdrawn=Sum('amount')):
+        balances.setdefault(row['seller'], dict.fromkeys(ORDER_BALANCE_FIELDS, zero))['withdrawn'] = row['withdrawn']
+    return balances
+
+
+def compute_seller_balance(seller):
+    return compute_seller_balances([seller]).get(seller.pk, dict.fromkeys(BALANCE_FIELDS, Decimal('0')))
+
+
+def get_seller_balance(seller):
+    """The materialized balance row for a seller (all zeros if it has none yet)."""
+    try:
+        return SellerBalance.objects.get(seller=seller)
+    except SellerBalance.DoesNotExist:
+        return SellerBalance(seller_id=seller.pk)
@@ -0,0 +1,97 @@
+"""
+Order fee calculation.
+
+Lahza takes ``LAHZA_FEE_RATE`` of the gig price; the platform takes its
+rate (``PLATFORM_FEE_RATE``, or a per-category override from
+``PLATFORM_FEE_RATES_BY_CATEGORY``) of what is left. Both fees are rounded
+half-up to cents and the seller payout is the remainder, so the three
+parts always add up to the price.
+
+The same math is available per order (``calculate_fees``), for a batch of
+prices (``calculate_fees_batch``) and as database expressions
+(``fee_expressions``) for annotations, aggregates and set-based updates.
+"""
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db.models import Case, DecimalField, ExpressionWrapper, Value, When
+from django.db.models.functions import Round
+from django.db.models.lookups import Exact
+
+CENT = Decimal('0.01')
+
+FeeBreakdown = namedtuple('FeeBreakdown', ['lahza_fee', 'platform_fee', 'seller_payout'])
+
+
+def lahza_rate():
+    return Decimal(str(getattr(settings, 'LAHZA_FEE_RATE', '0.025')))
+
+
+def platform_rates():
+    """The default platform rate and the {category_id: rate} overrides."""
+    default = Decimal(str(getattr(settings, 'PLATFORM_FEE_RATE', '0.075')))
+    overrides = {
+        int(category_id): Decimal(str(rate))
+        for category_id, rate in getattr(settings, 'PLATFORM_FEE_RATES_BY_CATEGORY', {}).items()
+    }
+    return default, overrides
+
+
+def _breakdown(price, lahza, platform):
+    lahza_fee = (price * lahza).quantize(CENT, ROUND_HALF_UP)
+    platform_fee = ((price - price * lahza) * platform).quantize(CENT, ROUND_HALF_UP)
+    return FeeBreakdown(lahza_fee, platform_fee, price - lahza_fee - platform_fee)
+
+
+def calculate_fees(price, category_id=None):
+    default, overrides = platform_rates()
+    return _breakdown(Decimal(price), lahza_rate(), overrides.get(category_id, default))
+
+
+def calculate_fees_batch(prices, category_ids=None):
+    """
+    Fee breakdowns for a sequence of prices (and optionally their category
+    ids), reading the rates once for the whole batch.
+    """
+    lahza = lahza_rate()
+    default, overrides = platform_rates()
+    if category_ids is None:
+        return [_breakdown(price, lahza, default) for price in prices]
+    return [
+        _breakdown(price, lahza, overrides.get(category_id, default))
+        for price, category_id in zip(prices, category_ids)
+    ]
+
+
+def order_fees(order):
+    """Fees for an order with its gig and service loaded."""
+    return calculate_fees(order.gig.price, order.gig.service.category_id)
+
+
+def fee_expressions(price, category=None):
+    """
+    Database expressions for the fee breakdown of ``price``, e.g.
+    ``Order.objects.aggregate(**fee_expressions(F('gig__price'), F('gig__service__category')))``.
+    Postgres rounds numerics half away from zero, matching ``calculate_fees``
+    for non-negative prices.
+    """
+    money = DecimalField(max_digits=12, decimal_places=2)
+    lahza = Value(lahza_rate())
+    default, overrides = platform_rates()
+    if category is not None and overrides:
+        platform = Case(
+            *[When(Exact(category, category_id), then=Value(rate)) for category_id, rate in overrides.items()],
+            default=Value(default),
+        )
+    else:
+        platform = Value(default)
+
+    lahza_fee = Round(price * lahza, 2, output_field=money)
+    platform_fee = Round((price - price * lahza) * platform, 2, output_field=money)
+    return {
+        'lahza_fee': lahza_fee,
+        'platform_fee': platform_fee,
+        'seller_payout': ExpressionWrapper(price - lahza_fee - platform_fee, output_field=money),
+    }
+
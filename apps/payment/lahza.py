@@ -0,0 +1,212 @@
+"""
+HTTP client for the Lahza payment gateway.
+
+One ``LahzaClient`` per process keeps a pooled ``requests.Session`` so
+payments reuse open TLS connections. Every call is bounded by connect and
+read timeouts; idempotent calls are retried a few times with jittered
+exponential backoff, and a circuit breaker fails fast while Lahza is down
+instead of tying up workers on calls that will time out anyway.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+class LahzaError(Exception):
+    pass
+
+
+class LahzaUnavailable(LahzaError):
+    """Lahza couldn't be reached, timed out, kept failing or the circuit is open."""
+
+
+class LatencyStats:
+    """Process-local call counters and recent latencies (in milliseconds)."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def record(self, elapsed_ms, failed=False):
+        with self._lock:
+            self.calls += 1
+            self.failures += failed
+            self._latencies.append(elapsed_ms)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retries,
+                'rejected': self.rejected,
+            }
+        for label, fraction in (('p50_ms', 0.5), ('p95_ms', 0.95), ('max_ms', 1.0)):
+            stats[label] = latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] if latencies else None
+        return stats
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``reset_timeout`` seconds, then lets a single trial call through
+    (half-open) to decide whether to close again.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+class LahzaClient:
+    RETRY_STATUSES = {429, 502, 503, 504}
+
+    def __init__(self, base_url, secret_key, connect_timeout=3.05, read_timeout=10, max_retries=2,
+                 backoff=0.2, pool_size=10, breaker=None):
+        self.base_url = (base_url or '').rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = LatencyStats()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {secret_key}',
+            'Content-Type': 'application/json',
+        })
+
+    def initialize_transaction(self, payload):
+        # Not idempotent: only retried when the connection was never established
+        return self.request('POST', '/transaction/initialize', json=payload, idempotent=False)
+
+    def verify_transaction(self, reference):
+        return self.request('GET', f'/transaction/verify/{reference}')
+
+    def request(self, method, path, idempotent=True, **kwargs):
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.stats.record_rejected()
+                raise LahzaUnavailable("Lahza circuit is open.")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            except requests.RequestException as exc:
+                self._record(started, failed=True)
+                retryable = idempotent or isinstance(exc, requests.ConnectTimeout)
+                if retryable and attempt < self.max_retries:
+                    attempt = self._wait(attempt)
+                    continue
+                raise LahzaUnavailable(f"Lahza request failed: {exc}") from exc
+            except BaseException:
+                # Anything else must still settle the call, or a half-open
+                # breaker would wait forever for its trial to finish
+                self._record(started, failed=True)
+                raise
+
+            failed = response.status_code >= 500
+            self._record(started, failed=failed)
+            if idempotent and response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                attempt = self._wait(attempt)
+                continue
+            return response
+
+    def _record(self, started, failed):
+        self.stats.record((time.perf_counter() - started) * 1000, failed=failed)
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _wait(self, attempt):
+        # Full jitter keeps retrying workers from hitting Lahza in lockstep
+        self.stats.record_retry()
+        time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        return attempt + 1
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client, built from the LAHZA_* settings on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LahzaClient(
+                settings.LAHZA_API_URL,
+                settings.LAHZA_SECRET_KEY,
+                connect_timeout=getattr(settings, 'LAHZA_CONNECT_TIMEOUT', 3.05),
+                read_timeout=getattr(settings, 'LAHZA_READ_TIMEOUT', 10),
+                max_retries=getattr(settings, 'LAHZA_MAX_RETRIES', 2),
+                breaker=CircuitBreaker(
+                    failure_threshold=getattr(settings, 'LAHZA_CIRCUIT_FAILURE_THRESHOLD', 5),
+                    reset_timeout=getattr(settings, 'LAHZA_CIRCUIT_RESET_TIMEOUT', 30),
+                ),
+            )
+        return _client
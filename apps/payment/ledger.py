@@ -0,0 +1,81 @@
+"""
+Incremental updates of the materialized SellerBalance rows.
+
+Each money-moving event snapshots an order's contribution to its seller's
+balance before and after the change and applies the difference with F()
+expressions while holding the balance row lock. Call these inside the
+transaction that saves the order so both commit together.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from .balances import BALANCE_FIELDS, ORDER_BALANCE_FIELDS, compute_seller_balances, earning_status_ids
+from .models import SellerBalance
+
+
+def order_contribution(order):
+    """What this order adds to its seller's balance in its current state."""
+    zero = Decimal('0')
+    contribution = dict.fromkeys(ORDER_BALANCE_FIELDS, zero)
+    if order is None:
+        return contribution
+
+    in_progress, delivered, completed = earning_status_ids()
+    if order.status_id not in (in_progress, delivered, completed):
+        return contribution
+
+    price = order.gig.price
+    contribution['total_earned'] = price
+    if order.is_paid and order.status_id in (in_progress, delivered):
+        contribution['held'] = price
+    if order.status_id == completed and not order.payout_sent:
+        if order.is_paid:
+            contribution['available'] = price
+        contribution['pending_payout'] = order.seller_payout or zero
+    return contribution
+
+
+def apply_balance_deltas(deltas):
+    """
+    Add {seller_id: {field: delta}} to the sellers' balance rows, creating
+    missing rows and locking them in seller order to avoid deadlocks.
+    """
+    deltas = {
+        seller_id: {field: value for field, value in delta.items() if value}
+        for seller_id, delta in deltas.items()
+    }
+    deltas = {seller_id: delta for seller_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        SellerBalance.objects.bulk_create(
+            [SellerBalance(seller_id=seller_id) for seller_id in deltas], ignore_conflicts=True
+        )
+        list(SellerBalance.objects.select_for_update().filter(seller_id__in=deltas).order_by('seller_id').values_list('pk'))
+        for seller_id, delta in deltas.items():
+            SellerBalance.objects.filter(seller_id=seller_id).update(
+                **{field: F(field) + value for field, value in delta.items()}
+            )
+
+
+def record_order_change(order, before, after=None):
+    """Apply the change from the ``before`` contribution to the order's current one."""
+    if after is None:
+        after = order_contribution(order)
+    apply_balance_deltas({
+        order.gig.seller_id: {field: after[field] - before[field] for field in ORDER_BALANCE_FIELDS}
+    })
+
+
+def record_withdrawal(seller_id, amount):
+    apply_balance_deltas({seller_id: {'withdrawn': amount}})
+
+
+def refresh_seller_balance(seller_id):
+    """Overwrite a seller's balance row with freshly computed values."""
+    values = compute_seller_balances([seller_id]).get(seller_id, dict.fromkeys(BALANCE_FIELDS, Decimal('0')))
+    with transaction.atomic():
+        SellerBalance.objects.update_or_create(seller_id=seller_id, defaults=values)
@@ -1,41 +1,108 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
+import time
+from collections import defaultdict
 from datetime import timedelta
 from decimal import Decimal
 
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
 from apps.orders.models import Order, OrderStatus
+from apps.payment.balances import ORDER_BALANCE_FIELDS
+from apps.payment.fees import calculate_fees_batch, fee_expressions
+from apps.payment.ledger import apply_balance_deltas, order_contribution
+
 
 class Command(BaseCommand):
     help = "Auto-completes delivered orders older than 5 days and releases payout"
 
-    def handle(self, *args, **kwargs):
-        five_days_ago = timezone.now() - timedelta(days=5)
-        delivered_status = OrderStatus.objects.get(name="Delivered")
-        completed_status = OrderStatus.objects.get(name="Completed")
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Orders completed per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be completed")
 
-        orders = Order.objects.filter(
+    def eligible_orders(self):
+        five_days_ago = timezone.now() - timedelta(days=5)
+        delivered_status = OrderStatus.objects.get_cached(name=OrderStatus.DELIVERED)
+        return Order.objects.filter(
             status=delivered_status,
             delivery_date__lte=five_days_ago,
             is_active=True,
             is_paid=True,
             payout_sent=False
-        ).select_related('gig')
+        ).select_related('gig__service').order_by('pk')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        started = time.monotonic()
+
+        if options['dry_run']:
+            stats = self.summarize(chunk_size)
+        else:
+            stats = self.release(chunk_size)
+
+        elapsed = time.monotonic() - started
+        rate = stats['orders'] / elapsed if elapsed else 0
+        verb = "Would auto-complete" if options['dry_run'] else "Auto-completed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['orders']} orders in {stats['chunks']} chunks "
+            f"({elapsed:.2f}s, {rate:.0f} orders/s). "
+            f"Platform fees: {stats['platform_fee']}, seller payouts: {stats['seller_payout']}"
+        ))
+
+    def summarize(self, chunk_size):
+        # The fee totals are computed by the database, no rows are loaded
+        fees = fee_expressions(F('gig__price'), F('gig__service__category'))
+        stats = self.eligible_orders().aggregate(
+            orders=Count('pk'),
+            platform_fee=Sum(fees['platform_fee'], default=Decimal('0')),
+            seller_payout=Sum(fees['seller_payout'], default=Decimal('0')),
+        )
+        stats['chunks'] = -(-stats['orders'] // chunk_size)
+        return stats
+
+    def release(self, chunk_size):
+        completed_status = OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        stats = {'orders': 0, 'chunks': 0, 'platform_fee': Decimal('0'), 'seller_payout': Decimal('0')}
+
+        while True:
+            with transaction.atomic():
+                # Rows another run has claimed are skipped, so runs can overlap safely
+                orders = list(
+                    self.eligible_orders().select_for_update(skip_locked=True, of=('self',))[:chunk_size]
+                )
+                if not orders:
+                    break
+
+                now = timezone.now()
+                deltas = defaultdict(lambda: dict.fromkeys(ORDER_BALANCE_FIELDS, Decimal('0')))
+                breakdowns = calculate_fees_batch(
+                    [order.gig.price for order in orders], [order.gig.service.category_id for order in orders]
+                )
+                for order, fees in zip(orders, breakdowns):
+                    before = order_contribution(order)
+                    order.platform_fee, order.seller_payout = fees.platform_fee, fees.seller_payout
+                    order.status = completed_status
+                    order.updated_at = now
+                    after = order_contribution(order)
 
-        for order in orders:
-            gig_price = order.gig.price
+                    seller_delta = deltas[order.gig.seller_id]
+                    for field in ORDER_BALANCE_FIELDS:
+                        seller_delta[field] += after[field] - before[field]
 
-            lahza_fee = gig_price * Decimal('0.025')
-            after_lahza = gig_price - lahza_fee
+                    stats['platform_fee'] += order.platform_fee
+                    stats['seller_payout'] += order.seller_payout
 
-            platform_fee = after_lahza * Decimal('0.075')
-            seller_payout = after_lahza - platform_fee
+                # bulk_update skips the ledger signals, so apply the balance changes here
+                Order.objects.bulk_update(
+                    orders, ['status', 'platform_fee', 'seller_payout', 'updated_at'], batch_size=chunk_size
+                )
+                apply_balance_deltas(deltas)
 
-            order.status = completed_status
-            order.platform_fee = round(platform_fee, 2)
-            order.seller_payout = round(seller_payout, 2)
-            order.payout_sent = False
-            order.save()
+            stats['orders'] += len(orders)
+            stats['chunks'] += 1
+            self.stdout.write(f"Chunk {stats['chunks']}: completed {len(orders)} orders")
 
-            self.stdout.write(self.style.SUCCESS(
-                f"Auto-completed order #{order.id}. Payout: {seller_payout}"
-            ))
+        return stats
@@ -0,0 +1,96 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from apps.marketplace.models import Categories, Gigs, Services
+from apps.orders.models import Order, OrderStatus
+from apps.payment.fees import fee_expressions, order_fees
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds orders and compares filling their fees with a per-row save() loop against one "
+        "set-based UPDATE using the fee expressions; everything is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000, help="Number of orders to seed")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--per-row-sample', type=int,
+            help="Time the per-row loop over only this many orders (it runs at tens of orders/s)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['count'], options['per_row_sample'], random.Random(options['seed']))
+                transaction.set_rollback(True)
+        finally:
+            # Seeded statuses were rolled back with everything else
+            OrderStatus.objects.clear_cache()
+
+    def seed(self, count, rng):
+        for name in (OrderStatus.IN_PROGRESS, OrderStatus.DELIVERED, OrderStatus.COMPLETED):
+            OrderStatus.objects.get_or_create(name=name)
+        completed = OrderStatus.objects.get(name=OrderStatus.COMPLETED)
+
+        seller = User.objects.create(username='benchmark-seller', email='benchmark-seller@example.com')
+        buyer = User.objects.create(username='benchmark-buyer', email='benchmark-buyer@example.com')
+        services = Services.objects.bulk_create([
+            Services(name=f'Benchmark {i}', category=Categories.objects.create(name=f'Benchmark {i}'))
+            for i in range(10)
+        ])
+        gigs = Gigs.objects.bulk_create([
+            Gigs(
+                seller=seller, service=rng.choice(services), title=f'Gig {i}', description='Benchmark',
+                price=Decimal(rng.randint(500, 500_000)) / 100, delivery_time=1,
+            )
+            for i in range(1000)
+        ])
+        # bulk_create skips the order signals, so seeding doesn't touch the ledger
+        Order.objects.bulk_create(
+            [Order(buyer=buyer, gig=rng.choice(gigs), status=completed, requirements='r') for _ in range(count)],
+            batch_size=5000,
+        )
+        return Order.objects.filter(buyer=buyer)
+
+    def run(self, count, sample, rng):
+        orders = self.seed(count, rng)
+        sample = min(sample or count, count)
+
+        started = time.perf_counter()
+        for order in orders.select_related('gig__service').order_by('pk')[:sample]:
+            fees = order_fees(order)
+            order.platform_fee = fees.platform_fee
+            order.seller_payout = fees.seller_payout
+            order.save(update_fields=['platform_fee', 'seller_payout'])
+        per_row_elapsed = time.perf_counter() - started
+        per_row = set(orders.exclude(platform_fee=None).values_list('pk', 'platform_fee', 'seller_payout'))
+
+        orders.update(platform_fee=None, seller_payout=None)
+
+        # UPDATE can't join, so the gig's price and category come from subqueries
+        gig = Gigs.objects.filter(pk=OuterRef('gig_id'))
+        fees = fee_expressions(Subquery(gig.values('price')), Subquery(gig.values('service__category')))
+        started = time.perf_counter()
+        orders.update(platform_fee=fees['platform_fee'], seller_payout=fees['seller_payout'])
+        batch_elapsed = time.perf_counter() - started
+
+        set_based = orders.filter(pk__in=[pk for pk, _, _ in per_row])
+        if set(set_based.values_list('pk', 'platform_fee', 'seller_payout')) != per_row:
+            self.stderr.write(self.style.ERROR("Per-row and set-based results differ"))
+
+        rates = {}
+        for label, rows, elapsed in (('per-row', sample, per_row_elapsed), ('set-based', count, batch_elapsed)):
+            rates[label] = rows / elapsed if elapsed else 0
+            self.stdout.write(f"{label:<10} {rows} orders in {elapsed:.3f}s  ({rates[label]:,.0f} orders/s)")
+        if rates['per-row']:
+            self.stdout.write(self.style.SUCCESS(f"set-based speedup: {rates['set-based'] / rates['per-row']:.1f}x"))
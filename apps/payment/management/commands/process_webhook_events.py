@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payment.webhooks import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Processes queued Lahza webhook events in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5, help="Attempts before an event is marked failed")
+        parser.add_argument('--forever', action='store_true', help="Keep polling instead of exiting once the queue is empty")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+
+    def handle(self, *args, **options):
+        totals = {'events': 0, 'paid': 0, 'failed': 0}
+        started = time.monotonic()
+
+        while True:
+            events, paid, failed = process_pending_events(options['batch_size'], options['max_attempts'])
+            totals['events'] += events
+            totals['paid'] += paid
+            totals['failed'] += failed
+            if events:
+                self.stdout.write(f"Processed {events} events ({paid} orders paid, {failed} failed)")
+                continue
+            if not options['forever']:
+                break
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['events']} events processed in {time.monotonic() - started:.2f}s: "
+            f"{totals['paid']} orders paid, {totals['failed']} failed"
+        ))
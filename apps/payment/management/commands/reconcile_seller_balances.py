@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.payment.balances import BALANCE_FIELDS, compute_seller_balances
+from apps.payment.models import SellerBalance
+
+
+class Command(BaseCommand):
+    help = "Recomputes seller balances from orders and withdrawals and reports (or repairs) drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Overwrite drifted balance rows with the computed values")
+
+    def handle(self, *args, **options):
+        zeros = dict.fromkeys(BALANCE_FIELDS, Decimal('0'))
+
+        with transaction.atomic():
+            expected = compute_seller_balances()
+            stored = {
+                row['seller']: row
+                for row in SellerBalance.objects.select_for_update().values('seller', *BALANCE_FIELDS)
+            }
+
+            drifted = []
+            for seller_id in sorted(expected.keys() | stored.keys()):
+                computed = expected.get(seller_id, zeros)
+                current = stored.get(seller_id, zeros)
+                changes = {
+                    field: (current[field], computed[field])
+                    for field in BALANCE_FIELDS if current[field] != computed[field]
+                }
+                if not changes:
+                    continue
+                drifted.append((seller_id, computed))
+                details = ', '.join(f"{field} {old} -> {new}" for field, (old, new) in changes.items())
+                self.stdout.write(self.style.WARNING(f"Seller #{seller_id}: {details}"))
+
+            if options['fix']:
+                for seller_id, computed in drifted:
+                    SellerBalance.objects.update_or_create(seller_id=seller_id, defaults=computed)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(drifted)} seller balances {'repaired' if options['fix'] else 'drifted'}"
+        ))
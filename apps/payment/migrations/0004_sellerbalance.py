@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-18 10:52
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def backfill_seller_balances(apps, schema_editor):
+    # The ledger only applies deltas from here on, so start from the balances
+    # the existing orders and withdrawals add up to. Statuses are matched by
+    # name, so a database without them simply has nothing to backfill.
+    Order = apps.get_model('orders', 'Order')
+    WithdrawalRequest = apps.get_model('payment', 'WithdrawalRequest')
+    SellerBalance = apps.get_model('payment', 'SellerBalance')
+    zero = Decimal('0')
+    held = ['In Progress', 'Delivered']
+
+    rows = (
+        Order.objects.filter(status__name__in=held + ['Completed'])
+        .order_by()
+        .values('gig__seller')
+        .annotate(
+            total_earned=Sum('gig__price', default=zero),
+            held=Sum('gig__price', default=zero, filter=Q(status__name__in=held, is_paid=True)),
+            available=Sum(
+                'gig__price', default=zero,
+                filter=Q(status__name='Completed', is_paid=True, payout_sent=False),
+            ),
+            pending_payout=Sum(
+                'seller_payout', default=zero,
+                filter=Q(status__name='Completed', payout_sent=False),
+            ),
+        )
+    )
+    balances = {}
+    for row in rows:
+        seller_id = row.pop('gig__seller')
+        balances[seller_id] = SellerBalance(seller_id=seller_id, **row)
+    for row in WithdrawalRequest.objects.order_by().values('seller').annotate(withdrawn=Sum('amount')):
+        balances.setdefault(row['seller'], SellerBalance(seller_id=row['seller'])).withdrawn = row['withdrawn']
+    SellerBalance.objects.bulk_create(balances.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_rating_count_user_rating_sum'),
+        ('payment', '0003_withdrawalrequest_first_name_withdrawalrequest_iban_and_more'),
+        ('orders', '0003_remove_order_is_completed'),
+        ('marketplace', '0005_gigs_rating_count_gigs_rating_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerBalance',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_earned', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('held', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('available', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('pending_payout', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('withdrawn', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_seller_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 11:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_events_processed(apps, schema_editor):
+    # Events recorded before the queue existed were handled synchronously
+    WebhookEvent = apps.get_model('payment', 'WebhookEvent')
+    WebhookEvent.objects.update(status='processed', processed_at=models.F('received_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0005_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='payload',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['status', 'next_attempt_at', 'id'], name='webhook_event_queue_idx'),
+        ),
+        migrations.RunPython(mark_existing_events_processed, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 # Create your models here.
 
@@ -23,4 +24,46 @@ class WithdrawalRequest(models.Model):
     iban = models.CharField(max_length=34, null=True, blank=True)
 
     is_processed = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class SellerBalance(models.Model):
+    """
+    Materialized seller earnings, one row per seller, kept current by
+    apps.payment.ledger on every order/withdrawal event that moves money.
+    """
+    seller = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='balance')
+    total_earned = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    held = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    available = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pending_payout = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    withdrawn = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Balance of {self.seller_id}: {self.available} available"
+
+
+class WebhookEvent(models.Model):
+    """
+    Durable queue of Lahza webhook deliveries. The unique event_id rejects
+    duplicates at enqueue time; process_webhook_events drains pending rows.
+    """
+    PENDING, PROCESSED, FAILED = 'pending', 'processed', 'failed'
+    STATUSES = ((PENDING, 'Pending'), (PROCESSED, 'Processed'), (FAILED, 'Failed'))
+
+    event_id = models.CharField(max_length=255, unique=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at', 'id'], name='webhook_event_queue_idx'),
+        ]
+
+    def __str__(self):
+        return self.event_id
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.marketplace.models import Gigs
+from apps.orders.models import Order
+from .ledger import order_contribution, record_order_change, record_withdrawal, refresh_seller_balance
+from .models import WithdrawalRequest
+
+
+# Order fields that order_contribution() reads
+BALANCE_ORDER_FIELDS = {'status', 'is_paid', 'payout_sent', 'seller_payout', 'gig'}
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_contribution(sender, instance, update_fields=None, **kwargs):
+    instance._previous_contribution = None
+    if update_fields is not None and not BALANCE_ORDER_FIELDS & set(update_fields):
+        return
+
+    # Snapshot the stored order so post_save only applies what changed. Inside
+    # a transaction the row stays locked until commit, so a concurrent save of
+    # the same order waits and then snapshots this one's result instead of
+    # applying the same delta twice.
+    previous = None
+    if instance.pk:
+        previous = Order.objects.select_related('gig').filter(pk=instance.pk)
+        if connection.in_atomic_block:
+            previous = previous.select_for_update(of=('self',))
+        previous = previous.first()
+    instance._previous_contribution = order_contribution(previous)
+    instance._previous_seller_id = previous.gig.seller_id if previous else None
+
+
+@receiver(post_save, sender=Order)
+def update_seller_balance(sender, instance, **kwargs):
+    if instance._previous_contribution is None:
+        return
+    previous_seller_id = getattr(instance, '_previous_seller_id', None)
+    if previous_seller_id and previous_seller_id != instance.gig.seller_id:
+        refresh_seller_balance(previous_seller_id)
+        refresh_seller_balance(instance.gig.seller_id)
+        return
+    record_order_change(instance, instance._previous_contribution)
+
+
+@receiver(post_delete, sender=Order)
+def remove_from_seller_balance(sender, instance, **kwargs):
+    contribution = order_contribution(instance)
+    record_order_change(instance, contribution, after=order_contribution(None))
+
+
+@receiver(pre_save, sender=Gigs)
+def remember_previous_price(sender, instance, update_fields=None, **kwargs):
+    instance._previous_price = None
+    if instance.pk and (update_fields is None or 'price' in update_fields):
+        instance._previous_price = Gigs.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+
+
+@receiver(post_save, sender=Gigs)
+def reprice_seller_balance(sender, instance, created, **kwargs):
+    # Orders are valued at the gig's current price, so a price change moves every open order
+    if not created and instance._previous_price is not None and instance._previous_price != instance.price:
+        refresh_seller_balance(instance.seller_id)
+
+
+@receiver(post_save, sender=WithdrawalRequest)
+def record_withdrawal_request(sender, instance, created, **kwargs):
+    if created:
+        record_withdrawal(instance.seller_id, instance.amount)
+
+
+@receiver(post_delete, sender=WithdrawalRequest)
+def remove_withdrawal_request(sender, instance, **kwargs):
+    record_withdrawal(instance.seller_id, -instance.amount)
@@ -1,3 +1,491 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+
+from apps.communications.notification.models import Notification
+from apps.marketplace.models import Categories, Services, Gigs
+from apps.orders.models import Order, OrderStatus
+from .balances import compute_seller_balance, compute_seller_balances
+from .fees import calculate_fees, calculate_fees_batch, fee_expressions
+from .lahza import CircuitBreaker, LahzaClient, LahzaUnavailable
+from .models import LahzaTransaction, SellerBalance, WebhookEvent
+from .webhooks import process_pending_events
+
+User = get_user_model()
+
+
+class MarketplaceFixtureMixin:
+    """Statuses, a seller with two gigs and a buyer."""
+
+    def create_marketplace(self):
+        self.statuses = {
+            name: OrderStatus.objects.create(id=status_id, name=name)
+            for status_id, name in (
+                (1, OrderStatus.IN_PROGRESS), (2, OrderStatus.DELIVERED), (3, OrderStatus.COMPLETED),
+                (4, OrderStatus.CANCELLED), (5, OrderStatus.REVISION),
+            )
+        }
+        self.seller = User.objects.create(username='seller', email='seller@example.com')
+        self.buyer = User.objects.create(username='buyer', email='buyer@example.com')
+        service = Services.objects.create(name='Logo', category=Categories.objects.create(name='Design'))
+        self.gig = Gigs.objects.create(
+            seller=self.seller, service=service, title='Logo', description='A logo', price=100, delivery_time=3
+        )
+        self.other_gig = Gigs.objects.create(
+            seller=self.seller, service=service, title='Icon', description='An icon', price=40, delivery_time=2
+        )
+
+    def order(self, gig, status, **fields):
+        # bulk_create skips the new-order notification signal
+        return Order.objects.bulk_create([
+            Order(buyer=self.buyer, gig=gig, status=self.statuses[status], requirements='r', **fields)
+        ])[0]
+
+
+class SellerBalanceTests(MarketplaceFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_marketplace()
+        self.order(self.gig, OrderStatus.IN_PROGRESS)
+        self.order(self.gig, OrderStatus.DELIVERED, is_paid=True)
+        self.order(self.gig, OrderStatus.COMPLETED, is_paid=True, seller_payout=Decimal('87.94'))
+        self.order(self.other_gig, OrderStatus.COMPLETED, is_paid=True, payout_sent=True, seller_payout=Decimal('35.18'))
+        self.order(self.other_gig, OrderStatus.CANCELLED, is_paid=True)
+        # bulk_create bypasses the ledger signals, so materialize the rows
+        call_command('reconcile_seller_balances', '--fix', stdout=StringIO())
+
+    def test_compute_balance_is_two_queries(self):
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        with self.assertNumQueries(2):
+            balance = compute_seller_balance(self.seller)
+        self.assertEqual(balance, {
+            'total_earned': Decimal('340'),
+            'held': Decimal('100'),
+            'available': Decimal('100'),
+            'pending_payout': Decimal('87.94'),
+            'withdrawn': Decimal('0'),
+        })
+
+    def test_seller_without_orders_has_zero_balance(self):
+        self.assertEqual(set(compute_seller_balance(self.buyer).values()), {Decimal('0')})
+
+    def test_earnings_endpoints_read_one_row(self):
+        self.client.force_authenticate(user=self.seller)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/seller/earnings/')
+        self.assertEqual(response.data['total_earnings'], Decimal('340'))
+        self.assertEqual(response.data['available_money'], Decimal('100'))
+        self.assertEqual(response.data['held_money'], Decimal('100'))
+
+        response = self.client.get('/api/payment/my-earnings/')
+        self.assertEqual(response.data['total_earned'], Decimal('87.94'))
+
+    def test_withdrawal_is_limited_to_available_money(self):
+        self.client.force_authenticate(user=self.seller)
+        data = {'first_name': 'A', 'last_name': 'B', 'iban': 'PS00', 'amount': '150'}
+        response = self.client.post(reverse('request-withdrawal'), data)
+        self.assertEqual(response.status_code, 400)
+
+    def test_pending_withdrawals_reserve_available_money(self):
+        self.client.force_authenticate(user=self.seller)
+        data = {'first_name': 'A', 'last_name': 'B', 'iban': 'PS00', 'amount': '60'}
+        self.assertEqual(self.client.post(reverse('request-withdrawal'), data).status_code, 200)
+        # Only 40 of the 100 available is left while the first request is pending
+        self.assertEqual(self.client.post(reverse('request-withdrawal'), data).status_code, 400)
+        data['amount'] = '40'
+        self.assertEqual(self.client.post(reverse('request-withdrawal'), data).status_code, 200)
+        data['amount'] = '-10'
+        self.assertEqual(self.client.post(reverse('request-withdrawal'), data).status_code, 400)
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        SellerBalance.objects.filter(seller=self.seller).update(held=Decimal('1'))
+
+        out = StringIO()
+        call_command('reconcile_seller_balances', stdout=out)
+        self.assertIn('held 1.00 -> 100', out.getvalue())
+        self.assertIn('1 seller balances drifted', out.getvalue())
+        self.assertEqual(SellerBalance.objects.get(seller=self.seller).held, Decimal('1'))
+
+        call_command('reconcile_seller_balances', '--fix', stdout=StringIO())
+        self.assertEqual(SellerBalance.objects.get(seller=self.seller).held, Decimal('100'))
+
+
+@override_settings(NOTIFICATION_BACKEND='apps.communications.notification.dispatcher.LocalBackend')
+class SellerLedgerTests(MarketplaceFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_marketplace()
+        self.admin = User.objects.create(username='admin', email='admin@example.com', is_staff=True)
+        self.order_obj = Order.objects.create(
+            buyer=self.buyer, gig=self.gig, status=self.statuses[OrderStatus.IN_PROGRESS], requirements='r'
+        )
+
+    def balance(self):
+        return SellerBalance.objects.get(seller=self.seller)
+
+    def assertLedgerMatchesComputed(self):
+        stored = SellerBalance.objects.filter(seller=self.seller).values(*compute_seller_balance(self.seller)).get()
+        self.assertEqual(stored, compute_seller_balance(self.seller))
+
+    def test_saves_that_skip_balance_fields_skip_the_snapshot(self):
+        self.order_obj.lahza_transaction_id = 'tx-9'
+        with self.assertNumQueries(1):
+            self.order_obj.save(update_fields=['lahza_transaction_id'])
+
+    def test_order_lifecycle_updates_balance_incrementally(self):
+        self.assertEqual(self.balance().total_earned, Decimal('100'))
+        self.assertEqual(self.balance().held, Decimal('0'))
+
+        LahzaTransaction.objects.create(
+            order=self.order_obj, user=self.buyer, transaction_type='payment',
+            transaction_id='tx-1', amount=100, status='pending',
+        )
+        self.client.post('/api/payment/webhook/', {'data': {'reference': 'tx-1', 'status': 'success'}}, format='json')
+        call_command('process_webhook_events', stdout=StringIO())
+        self.assertEqual(self.balance().held, Decimal('100'))
+        self.assertLedgerMatchesComputed()
+
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.post(reverse('order-complete', args=[self.order_obj.pk]))
+        self.assertEqual(response.status_code, 200)
+        balance = self.balance()
+        self.assertEqual((balance.held, balance.available), (Decimal('0'), Decimal('100')))
+        self.assertEqual(balance.pending_payout, response.data['seller_payout'])
+        self.assertLedgerMatchesComputed()
+
+        self.client.force_authenticate(user=self.seller)
+        data = {'first_name': 'A', 'last_name': 'B', 'iban': 'PS00', 'amount': '60'}
+        self.assertEqual(self.client.post(reverse('request-withdrawal'), data).status_code, 200)
+        self.assertEqual(self.balance().withdrawn, Decimal('60'))
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.patch(reverse('admin-payout-approve', args=[self.order_obj.pk]), {})
+        balance = self.balance()
+        self.assertEqual((balance.available, balance.pending_payout), (Decimal('0'), Decimal('0')))
+        self.assertEqual(balance.total_earned, Decimal('100'))
+        self.assertLedgerMatchesComputed()
+
+    def test_cancel_and_reprice_keep_ledger_in_sync(self):
+        Order.objects.create(
+            buyer=self.buyer, gig=self.other_gig, status=self.statuses[OrderStatus.DELIVERED],
+            requirements='r', is_paid=True,
+        )
+        self.gig.price = 120
+        self.gig.save()
+        self.assertEqual(self.balance().total_earned, Decimal('160'))
+
+        self.order_obj.status = self.statuses[OrderStatus.CANCELLED]
+        self.order_obj.save()
+        self.assertEqual(self.balance().total_earned, Decimal('40'))
+        self.assertLedgerMatchesComputed()
+
+        Order.objects.filter(gig=self.other_gig).get().delete()
+        self.assertNotIn(self.seller.pk, compute_seller_balances([self.seller]))
+        self.assertEqual(self.balance().total_earned, Decimal('0'))
+
+
+class AutoReleasePayoutsTests(MarketplaceFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_marketplace()
+        week_ago = timezone.now() - timedelta(days=7)
+        for gig in (self.gig, self.gig, self.other_gig, self.other_gig, self.gig):
+            self.order(gig, OrderStatus.DELIVERED, is_paid=True, delivery_date=week_ago)
+        self.recent = self.order(self.gig, OrderStatus.DELIVERED, is_paid=True, delivery_date=timezone.now())
+        self.unpaid = self.order(self.gig, OrderStatus.DELIVERED, delivery_date=week_ago)
+        call_command('reconcile_seller_balances', '--fix', stdout=StringIO())
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('auto_release_payouts', '--dry-run', '--chunk-size', '2', stdout=out)
+        self.assertIn('Would auto-complete 5 orders in 3 chunks', out.getvalue())
+        self.assertFalse(Order.objects.filter(status=self.statuses[OrderStatus.COMPLETED]).exists())
+
+    def test_releases_in_chunks_and_updates_ledger(self):
+        out = StringIO()
+        call_command('auto_release_payouts', '--chunk-size', '2', stdout=out)
+        self.assertIn('Auto-completed 5 orders in 3 chunks', out.getvalue())
+
+        completed = Order.objects.filter(status=self.statuses[OrderStatus.COMPLETED])
+        self.assertEqual(completed.count(), 5)
+        self.assertFalse(completed.filter(payout_sent=True).exists())
+        self.assertEqual(completed.filter(gig=self.gig).first().seller_payout, Decimal('90.19'))
+        self.assertEqual(completed.filter(gig=self.gig).first().platform_fee, Decimal('7.31'))
+        self.assertEqual(Order.objects.get(pk=self.recent.pk).status, self.statuses[OrderStatus.DELIVERED])
+        self.assertEqual(Order.objects.get(pk=self.unpaid.pk).status, self.statuses[OrderStatus.DELIVERED])
+
+        stored = SellerBalance.objects.filter(seller=self.seller).values(*compute_seller_balance(self.seller)).get()
+        self.assertEqual(stored, compute_seller_balance(self.seller))
+        self.assertEqual(stored['available'], Decimal('380'))
+
+    def test_chunk_size_must_be_positive(self):
+        for chunk_size in ('0', '-1'):
+            with self.subTest(chunk_size=chunk_size), self.assertRaises(CommandError):
+                call_command('auto_release_payouts', '--dry-run', '--chunk-size', chunk_size, stdout=StringIO())
+
+    def test_chunk_is_a_fixed_number_of_queries(self):
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        OrderStatus.objects.get_cached(name=OrderStatus.DELIVERED)
+        with self.assertNumQueries(12):
+            call_command('auto_release_payouts', '--chunk-size', '5', stdout=StringIO())
+
+
+class FeeEngineTests(MarketplaceFixtureMixin, APITestCase):
+    def test_fees_round_half_up_and_add_up_to_price(self):
+        self.assertEqual(calculate_fees(Decimal('100')), (Decimal('2.50'), Decimal('7.31'), Decimal('90.19')))
+        # 2.925 rounds up; the payout takes the remainder
+        self.assertEqual(calculate_fees(Decimal('40')), (Decimal('1.00'), Decimal('2.93'), Decimal('36.07')))
+        for price in (Decimal('0.01'), Decimal('19.99'), Decimal('1234.56')):
+            self.assertEqual(sum(calculate_fees(price)), price)
+
+    def test_batch_matches_per_order(self):
+        prices = [Decimal('5'), Decimal('40'), Decimal('99.99'), Decimal('250.10')]
+        self.assertEqual(calculate_fees_batch(prices), [calculate_fees(price) for price in prices])
+
+    @override_settings(PLATFORM_FEE_RATES_BY_CATEGORY={7: '0.10'})
+    def test_category_rate_override(self):
+        self.assertEqual(calculate_fees(Decimal('100'), category_id=7).platform_fee, Decimal('9.75'))
+        self.assertEqual(calculate_fees(Decimal('100'), category_id=8).platform_fee, Decimal('7.31'))
+
+    def test_database_expressions_match_python(self):
+        self.create_marketplace()
+        category = self.gig.service.category
+        for price in ('40', '19.99', '1234.56'):
+            gig = Gigs.objects.create(
+                seller=self.seller, service=self.gig.service, title='Gig', description='A gig',
+                price=Decimal(price), delivery_time=1,
+            )
+            self.order(gig, OrderStatus.COMPLETED)
+
+        with self.settings(PLATFORM_FEE_RATES_BY_CATEGORY={category.pk: '0.10'}):
+            fees = fee_expressions(F('gig__price'), F('gig__service__category'))
+            rows = Order.objects.select_related('gig__service').annotate(
+                **{f'expected_{name}': expression for name, expression in fees.items()}
+            )
+            for order in rows:
+                self.assertEqual(
+                    (order.expected_lahza_fee, order.expected_platform_fee, order.expected_seller_payout),
+                    tuple(calculate_fees(order.gig.price, category.pk)),
+                )
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        err = StringIO()
+        orders = Order.objects.count()
+        call_command('benchmark_fees', '--count', '100', stdout=out, stderr=err)
+        self.assertIn('set-based speedup', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+        # The seeded orders are rolled back
+        self.assertEqual(Order.objects.count(), orders)
+
+
+class StubLahzaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.respond()
+
+    def respond(self):
+        server = self.server
+        server.requests.append((self.command, self.path, self.client_address[1], self.headers.get('Authorization')))
+        status_code, delay = server.responses.pop(0) if server.responses else (200, 0)
+        time.sleep(delay)
+        body = json.dumps({'data': {'reference': 'ref-1', 'authorization_url': 'https://pay.example/ref-1'}}).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LahzaClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubLahzaHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.responses = []
+        self.client = LahzaClient(self.base_url, 'sk_test', read_timeout=0.3, backoff=0)
+
+    def tearDown(self):
+        self.client.session.close()
+
+    def test_session_reuses_connection(self):
+        for _ in range(3):
+            self.assertEqual(self.client.verify_transaction('ref-1').status_code, 200)
+        ports = {port for _, _, port, _ in self.server.requests}
+        self.assertEqual(len(ports), 1)
+        self.assertEqual(self.server.requests[0][:2], ('GET', '/transaction/verify/ref-1'))
+        self.assertEqual(self.server.requests[0][3], 'Bearer sk_test')
+        self.assertEqual(self.client.stats.snapshot()['calls'], 3)
+
+    def test_idempotent_calls_retry_transient_errors(self):
+        self.server.responses = [(503, 0), (502, 0)]
+        self.assertEqual(self.client.verify_transaction('ref-1').status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.client.stats.snapshot()['retries'], 2)
+
+    def test_initialize_is_not_retried(self):
+        self.server.responses = [(503, 0)]
+        self.assertEqual(self.client.initialize_transaction({'amount': '100'}).status_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_read_timeout_is_bounded(self):
+        self.server.responses = [(200, 1)]
+        started = time.monotonic()
+        with self.assertRaises(LahzaUnavailable):
+            self.client.initialize_transaction({'amount': '100'})
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_circuit_opens_and_recovers(self):
+        now = [0]
+        self.client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+        self.server.responses = [(500, 0), (500, 0)]
+        self.client.initialize_transaction({})
+        self.client.initialize_transaction({})
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.OPEN)
+
+        with self.assertRaises(LahzaUnavailable):
+            self.client.initialize_transaction({})
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.client.stats.snapshot()['rejected'], 1)
+
+        now[0] = 31
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.client.initialize_transaction({}).status_code, 200)
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_unexpected_error_in_trial_reopens_circuit(self):
+        now = [0]
+        self.client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0])
+        self.server.responses = [(500, 0)]
+        self.client.initialize_transaction({})
+        now[0] = 31
+        with mock.patch.object(self.client.session, 'request', side_effect=ValueError("bad payload")):
+            with self.assertRaises(ValueError):
+                self.client.initialize_transaction({})
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.OPEN)
+
+        now[0] = 62
+        self.assertEqual(self.client.initialize_transaction({}).status_code, 200)
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+
+@override_settings(NOTIFICATION_BACKEND='apps.communications.notification.dispatcher.LocalBackend')
+class LahzaWebhookTests(MarketplaceFixtureMixin, APITestCase):
+    url = '/api/payment/webhook/'
+
+    def setUp(self):
+        self.create_marketplace()
+        self.order_obj = self.order(self.gig, OrderStatus.IN_PROGRESS)
+        call_command('reconcile_seller_balances', '--fix', stdout=StringIO())
+        LahzaTransaction.objects.create(
+            order=self.order_obj, user=self.buyer, transaction_type='payment',
+            transaction_id='tx-1', amount=100, status='pending',
+        )
+
+    def deliver(self, status='success', event_id='evt-1', reference='tx-1'):
+        body = {'event': 'charge.success', 'data': {'id': event_id, 'reference': reference, 'status': status}}
+        return self.client.post(self.url, body, format='json')
+
+    def process(self):
+        out = StringIO()
+        call_command('process_webhook_events', stdout=out)
+        return out.getvalue()
+
+    def test_webhook_only_enqueues(self):
+        # One INSERT inside a savepoint
+        with self.assertNumQueries(3):
+            self.assertEqual(self.deliver().data['detail'], 'Webhook queued.')
+        self.assertFalse(Order.objects.get(pk=self.order_obj.pk).is_paid)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.PENDING)
+
+    def test_duplicates_are_rejected(self):
+        self.deliver()
+        self.assertEqual(self.deliver().data['detail'], 'Duplicate event.')
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_success_marks_order_paid_and_notifies(self):
+        self.deliver()
+        self.assertIn('1 events processed', self.process())
+        self.assertTrue(Order.objects.get(pk=self.order_obj.pk).is_paid)
+        self.assertEqual(LahzaTransaction.objects.get(transaction_id='tx-1').status, 'success')
+        self.assertEqual(SellerBalance.objects.get(seller=self.seller).held, Decimal('100'))
+        self.assertEqual(
+            set(Notification.objects.values_list('user_id', 'title')),
+            {(self.buyer.pk, 'Payment Received'), (self.seller.pk, 'Order Paid')},
+        )
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (WebhookEvent.PROCESSED, 1))
+
+        # A later event for the settled transaction changes nothing
+        self.deliver(event_id='evt-2')
+        self.process()
+        self.assertEqual(SellerBalance.objects.get(seller=self.seller).held, Decimal('100'))
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_success_is_final_within_a_batch(self):
+        self.deliver()
+        self.deliver(status='failed', event_id='evt-2')
+        self.process()
+        self.assertEqual(LahzaTransaction.objects.get(transaction_id='tx-1').status, 'success')
+        self.assertTrue(Order.objects.get(pk=self.order_obj.pk).is_paid)
+
+    def test_batch_is_a_fixed_number_of_queries(self):
+        other = self.order(self.other_gig, OrderStatus.IN_PROGRESS)
+        LahzaTransaction.objects.create(
+            order=other, user=self.buyer, transaction_type='payment',
+            transaction_id='tx-2', amount=40, status='pending',
+        )
+        self.deliver()
+        self.deliver(reference='tx-2', event_id='evt-2')
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        with self.assertNumQueries(15):
+            events, paid, failed = process_pending_events()
+        self.assertEqual((events, paid, failed), (2, 2, 0))
+
+    def test_failing_event_is_retried_with_backoff(self):
+        self.deliver()
+        self.deliver(reference='tx-2', event_id='evt-2')
+        with mock.patch('apps.payment.webhooks.apply_payment_statuses', side_effect=[RuntimeError('boom'), [], RuntimeError('boom')]):
+            self.process()
+        good, bad = WebhookEvent.objects.order_by('id')
+        self.assertEqual(good.status, WebhookEvent.PROCESSED)
+        self.assertEqual((bad.status, bad.attempts, bad.last_error), (WebhookEvent.PENDING, 1, 'boom'))
+        self.assertGreater(bad.next_attempt_at, timezone.now())
+
+        WebhookEvent.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now(), attempts=4)
+        with mock.patch('apps.payment.webhooks.apply_payment_statuses', side_effect=RuntimeError('boom')):
+            self.process()
+        self.assertEqual(WebhookEvent.objects.get(pk=bad.pk).status, WebhookEvent.FAILED)
+
+    def test_malformed_payload(self):
+        self.assertEqual(self.client.post(self.url, {'data': {}}, format='json').status_code, 400)
@@ -1,20 +1,21 @@
-import requests
-from django.conf import settings
+from django.db.models import Sum
+from django.db.transaction import atomic
 from rest_framework import permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from apps.orders.models import Order, OrderStatus
-from apps.marketplace.models import Gigs
-from .models import LahzaTransaction, WithdrawalRequest
+from .balances import get_seller_balance
+from .lahza import LahzaUnavailable, get_client
+from .webhooks import enqueue_webhook
+from .models import LahzaTransaction, SellerBalance, WithdrawalRequest
 from rest_framework import generics, permissions
 from .serializers import PayoutApprovalSerializer, WithdrawalRequestSerializer, WithdrawalRequestStatusSerializer
-from apps.communications.notification.utils import notify_user
+from apps.communications.notification.utils import notify_users
 from rest_framework.permissions import AllowAny
 
 
 from decimal import Decimal
-from django.db.models import Sum
 # Create your views here.
 from django.contrib.auth import get_user_model
 User = get_user_model()  
@@ -38,22 +39,15 @@ class InitPaymentView(APIView):
                 "webhook_url": "https://292c-103-206-108-122.ngrok-free.app/api/payment/webhook/"
             }
 
-            headers = {
-                "Authorization": f"Bearer {settings.LAHZA_SECRET_KEY}",
-                "Content-Type": "application/json"
-            }
-
-            response = requests.post(
-                f"{settings.LAHZA_API_URL}/transaction/initialize",
-                json=payload,
-                headers=headers
-            )
-
+            try:
+                response = get_client().initialize_transaction(payload)
+            except LahzaUnavailable:
+                return Response({"error": "Payment gateway unavailable, try again later."}, status=503)
 
             if response.status_code == 200:
                 data = response.json()
                 order.lahza_transaction_id = data['data']['reference']
-                order.save()
+                order.save(update_fields=['lahza_transaction_id', 'updated_at'])
 
                 LahzaTransaction.objects.create(
                     order=order,
@@ -70,7 +64,6 @@ class InitPaymentView(APIView):
                     }
                     )
             else:
-                print("Lahza raw response:", response.text)
                 return Response({"error": "Lahza error", "raw": response.text}, status=response.status_code)
 
         except Order.DoesNotExist:
@@ -82,39 +75,22 @@ class LahzaWebhookView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        payload = request.data.get('data', {})
-        tx_id = payload.get('reference')  
-        status = payload.get('status')
+        payload = request.data.get('data') or {}
+        if not payload.get('reference') or not payload.get('status'):
+            return Response({"error": "reference and status are required."}, status=400)
 
-        try:
-            transaction = LahzaTransaction.objects.get(transaction_id=tx_id)
-            transaction.status = status
-            transaction.save()
-
-            if status == 'success':
-                order = transaction.order
-                order.is_paid = True
-                order.save()
-        except LahzaTransaction.DoesNotExist:
-            pass
-
-        return Response({"detail": "Webhook processed."})
+        # Processing happens in process_webhook_events; just persist and ACK
+        if not enqueue_webhook(request.data):
+            return Response({"detail": "Duplicate event."})
+
+        return Response({"detail": "Webhook queued."})
     
 class SellerEarningsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         seller = request.user
-
-        completed_status = OrderStatus.objects.get(name="Completed")
-
-        orders = Order.objects.filter(
-            gig__seller=seller,
-            status=completed_status,
-            payout_sent=False
-        )
-
-        total_earned = orders.aggregate(total=Sum('seller_payout'))['total'] or 0
+        total_earned = get_seller_balance(seller).pending_payout
 
         return Response({
             "seller": seller.username,
@@ -145,48 +121,39 @@ class RequestWithdrawalView(APIView):
             amount = Decimal(amount)
         except:
             return Response({"error": "Invalid amount."}, status=400)
+        if amount <= 0:
+            return Response({"error": "Invalid amount."}, status=400)
 
-        # Get statuses
-        status_in_progress = OrderStatus.objects.get(name="In Progress").id
-        status_delivered = OrderStatus.objects.get(name="Delivered").id
-        status_completed = OrderStatus.objects.get(name="Completed").id
-
-        valid_statuses = [status_in_progress, status_delivered, status_completed]
-
-        # Get seller gigs
-        seller_gigs = Gigs.objects.filter(seller=seller)
-
-        # Get orders for seller gigs
-        orders = Order.objects.filter(gig__in=seller_gigs, status__in=valid_statuses).select_related('gig')
-
-        # Compute available balance (same logic as SellerEarningsView)
-        available_balance = sum(
-            order.gig.price for order in orders
-            if order.status_id == status_completed and order.is_paid and not order.payout_sent
-        )
-
-        if amount > available_balance:
-            return Response({"error": "Insufficient balance."}, status=400)
-
-        # Create withdrawal request
-        WithdrawalRequest.objects.create(
-            seller=seller,
-            amount=amount,
-            first_name=first_name,
-            last_name=last_name,
-            middle_name=middle_name,
-            iban=iban
-        )
+        with atomic():
+            # Serialize a seller's requests on their balance row and count the
+            # withdrawals still waiting for an admin against the available money
+            SellerBalance.objects.get_or_create(seller=seller)
+            balance = SellerBalance.objects.select_for_update().get(seller=seller)
+            requested = WithdrawalRequest.objects.filter(seller=seller, is_processed=False).aggregate(
+                total=Sum('amount', default=Decimal('0'))
+            )['total']
+
+            if amount > balance.available - requested:
+                return Response({"error": "Insufficient balance."}, status=400)
+
+            # Create withdrawal request (the payment signals add it to balance.withdrawn)
+            WithdrawalRequest.objects.create(
+                seller=seller,
+                amount=amount,
+                first_name=first_name,
+                last_name=last_name,
+                middle_name=middle_name,
+                iban=iban
+            )
 
         # Notify admins
         admins = User.objects.filter(is_staff=True, is_active=True)
-        for admin in admins:
-            notify_user(
-                user=admin,
-                title="New Withdrawal Request",
-                body=f"{seller.username} requested {amount} ILS withdrawal.",
-                notification_type="system"
-            )
+        notify_users(
+            admins,
+            title="New Withdrawal Request",
+            body=f"{seller.username} requested {amount} ILS withdrawal.",
+            notification_type="system"
+        )
 
         return Response({"message": "Withdrawal request submitted."}, status=200)
 class AdminPayoutApprovalListView(generics.ListAPIView):
@@ -194,8 +161,8 @@ class AdminPayoutApprovalListView(generics.ListAPIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get_queryset(self):
-        completed_status = OrderStatus.objects.get(name="Completed")
-        return Order.objects.filter(status=completed_status, payout_sent=False)
+        completed_status = OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        return Order.objects.filter(status=completed_status, payout_sent=False).select_related('gig__seller')
 
 
 class AdminPayoutApproveView(generics.UpdateAPIView):
@@ -205,8 +172,11 @@ class AdminPayoutApproveView(generics.UpdateAPIView):
 
     def perform_update(self, serializer):
         instance = self.get_object()
+        if instance.payout_sent:
+            return
         instance.payout_sent = True
-        instance.save()
+        with atomic():
+            instance.save(update_fields=['payout_sent', 'updated_at'])
 class AdminWithdrawlRequest(generics.ListAPIView):
     serializer_class = WithdrawalRequestSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -0,0 +1,169 @@
+"""
+Lahza webhook handling.
+
+The webhook view only validates a delivery and enqueues it as a
+WebhookEvent (duplicates are rejected by the unique event id), so it
+answers in one INSERT. The process_webhook_events command drains the
+queue in batches: transaction and order updates are applied with a few
+conditional bulk UPDATEs, buyers and sellers are notified, and failing
+events are retried with exponential backoff.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.communications.notification.dispatcher import dispatch
+from apps.communications.notification.models import Notification
+from apps.orders.models import Order
+from .balances import ORDER_BALANCE_FIELDS
+from .ledger import apply_balance_deltas, order_contribution
+from .models import LahzaTransaction, WebhookEvent
+
+RETRY_BASE_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def webhook_event_id(body):
+    """Lahza's event id when sent, otherwise the reference/status pair."""
+    data = body.get('data') or {}
+    if data.get('id'):
+        return f"{body.get('event', 'event')}:{data['id']}"
+    return f"{data.get('reference')}:{data.get('status')}"
+
+
+def enqueue_webhook(body):
+    """Queue a delivery for processing; False if it was already received."""
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.create(event_id=webhook_event_id(body), payload=body)
+    except IntegrityError:
+        return False
+    return True
+
+
+def apply_payment_statuses(statuses):
+    """
+    Apply {reference: status} to the transactions and mark the orders of
+    successful ones paid. A transaction never leaves 'success' and rows
+    already in the target state aren't written. Returns the orders that
+    became paid.
+    """
+    by_status = defaultdict(list)
+    for reference, status in statuses.items():
+        by_status[status].append(reference)
+    for status, references in by_status.items():
+        LahzaTransaction.objects.filter(transaction_id__in=references).exclude(
+            status__in=['success', status]
+        ).update(status=status)
+
+    paid_references = by_status.get('success')
+    if not paid_references:
+        return []
+
+    orders = list(
+        Order.objects.select_for_update(of=('self',))
+        .select_related('gig')
+        .filter(
+            pk__in=LahzaTransaction.objects.filter(transaction_id__in=paid_references).values('order_id'),
+            is_paid=False,
+        )
+        .order_by('pk')
+    )
+    if not orders:
+        return []
+    Order.objects.filter(pk__in=[order.pk for order in orders]).update(is_paid=True, updated_at=timezone.now())
+
+    # update() skips the ledger signals, so move the orders' money to held here
+    deltas = defaultdict(lambda: dict.fromkeys(ORDER_BALANCE_FIELDS, Decimal('0')))
+    for order in orders:
+        before = order_contribution(order)
+        order.is_paid = True
+        after = order_contribution(order)
+        for field in ORDER_BALANCE_FIELDS:
+            deltas[order.gig.seller_id][field] += after[field] - before[field]
+    apply_balance_deltas(deltas)
+    return orders
+
+
+def payment_notifications(orders):
+    notifications = []
+    for order in orders:
+        notifications.append(Notification(
+            user_id=order.buyer_id,
+            title="Payment Received",
+            body=f"Your payment for order #{order.id} was received.",
+            notification_type="order",
+        ))
+        notifications.append(Notification(
+            user_id=order.gig.seller_id,
+            title="Order Paid",
+            body=f"Order #{order.id} for \"{order.gig.title}\" has been paid.",
+            notification_type="order",
+        ))
+    return notifications
+
+
+def process_events(events):
+    """Apply a list of events in the current transaction."""
+    statuses = {}
+    for event in events:
+        data = event.payload.get('data') or {}
+        reference, status = data.get('reference'), data.get('status')
+        # 'success' is final, otherwise the newest delivery wins
+        if statuses.get(reference) != 'success':
+            statuses[reference] = status
+
+    paid_orders = apply_payment_statuses(statuses)
+    dispatch(payment_notifications(paid_orders))
+
+    WebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+        status=WebhookEvent.PROCESSED, processed_at=timezone.now(), attempts=F('attempts') + 1
+    )
+    return len(paid_orders)
+
+
+def schedule_retry(event, error, max_attempts):
+    event.attempts += 1
+    event.last_error = str(error)
+    if event.attempts >= max_attempts:
+        event.status = WebhookEvent.FAILED
+    else:
+        event.next_attempt_at = timezone.now() + min(RETRY_BASE_DELAY * 2 ** (event.attempts - 1), MAX_RETRY_DELAY)
+    event.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def process_pending_events(batch_size=100, max_attempts=5):
+    """
+    Claim and process one batch of due events. Rows claimed by another
+    worker are skipped. If the batch fails as a whole, its events are
+    retried one by one so a single bad event only delays itself.
+    Returns (events, paid_orders, failed).
+    """
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvent.PENDING, next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0, 0, 0
+
+        try:
+            with transaction.atomic():
+                return len(events), process_events(events), 0
+        except Exception:
+            pass
+
+        paid = failed = 0
+        for event in events:
+            try:
+                with transaction.atomic():
+                    paid += process_events([event])
+            except Exception as exc:
+                schedule_retry(event, exc, max_attempts)
+                failed += 1
+        return len(events), paid, failed
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.contrib.auth import get_user_model
+
+from apps.accounts.authentication import invalidate_users
+from apps.marketplace.models import Gigs
+from apps.reviews.models import Review
+from apps.reviews.signals import rating_avg_expression
+
+User = get_user_model()
+
+
+def _aggregate_subqueries(group_field):
+    stats = (
+        Review.objects.filter(is_active=True, **{group_field: OuterRef('pk')})
+        .order_by()
+        .values(group_field)
+    )
+    rating_sum = Coalesce(Subquery(stats.annotate(total=Sum('rating')).values('total')), Value(0))
+    rating_count = Coalesce(Subquery(stats.annotate(total=Count('id')).values('total')), Value(0))
+    return rating_sum, rating_count
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the stored rating_sum/rating_count of gigs and sellers from active reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows have drifted")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for label, model, group_field in (('gigs', Gigs, 'gig'), ('sellers', User, 'seller')):
+                rating_sum, rating_count = _aggregate_subqueries(group_field)
+                aggregates = {'rating_sum': rating_sum, 'rating_count': rating_count}
+                if model is Gigs:
+                    aggregates['rating_avg'] = rating_avg_expression(rating_sum, rating_count)
+                drifted = model.objects.exclude(**aggregates)
+
+                if options['dry_run']:
+                    count = drifted.count()
+                else:
+                    if model is User:
+                        # update() sends no post_save, so drop the cached users here
+                        invalidate_users(drifted.values_list('pk', flat=True))
+                    count = drifted.update(**aggregates)
+
+                self.stdout.write(self.style.SUCCESS(
+                    f"{count} {label} {'drifted' if options['dry_run'] else 'repaired'}"
+                ))
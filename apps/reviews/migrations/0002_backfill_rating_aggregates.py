@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Gigs = apps.get_model('marketplace', 'Gigs')
+    User = apps.get_model('accounts', 'User')
+
+    for model, group_field in ((Gigs, 'gig'), (User, 'seller')):
+        stats = (
+            Review.objects.filter(is_active=True, **{group_field: OuterRef('pk')})
+            .order_by()
+            .values(group_field)
+        )
+        model.objects.update(
+            rating_sum=Coalesce(Subquery(stats.annotate(total=Sum('rating')).values('total')), Value(0)),
+            rating_count=Coalesce(Subquery(stats.annotate(total=Count('id')).values('total')), Value(0)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+        ('marketplace', '0005_gigs_rating_count_gigs_rating_sum'),
+        ('accounts', '0006_user_rating_count_user_rating_sum'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
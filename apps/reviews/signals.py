@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from apps.accounts.authentication import invalidate_user
+from apps.marketplace.models import Gigs
+from apps.marketplace.ranking import schedule_ranking_refresh
+from .models import Review
+
+User = get_user_model()
+
+
+def rating_avg_expression(rating_sum, rating_count):
+    """rating_sum / rating_count as a float, 0 without reviews"""
+    return Coalesce(Cast(rating_sum, FloatField()) / NullIf(rating_count, 0), Value(0.0))
+
+
+def apply_rating_delta(gig_id, seller_id, rating_delta, count_delta):
+    """Shift the stored rating aggregates of a gig and its seller."""
+    if not rating_delta and not count_delta:
+        return
+    with transaction.atomic():
+        Gigs.objects.filter(pk=gig_id).update(
+            rating_sum=F('rating_sum') + rating_delta,
+            rating_count=F('rating_count') + count_delta,
+            rating_avg=rating_avg_expression(F('rating_sum') + rating_delta, F('rating_count') + count_delta),
+        )
+        schedule_ranking_refresh([gig_id])
+        User.objects.filter(pk=seller_id).update(
+            rating_sum=F('rating_sum') + rating_delta,
+            rating_count=F('rating_count') + count_delta,
+        )
+        # update() sends no post_save, so the cached seller is dropped here
+        invalidate_user(seller_id)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    # Keep the stored state so post_save can undo its old contribution
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = (
+            Review.objects.filter(pk=instance.pk)
+            .values('gig_id', 'seller_id', 'rating', 'is_active')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_aggregates(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    if previous and previous['is_active']:
+        if instance.is_active and (previous['gig_id'], previous['seller_id']) == (instance.gig_id, instance.seller_id):
+            apply_rating_delta(instance.gig_id, instance.seller_id, instance.rating - previous['rating'], 0)
+            return
+        apply_rating_delta(previous['gig_id'], previous['seller_id'], -previous['rating'], -1)
+    if instance.is_active:
+        apply_rating_delta(instance.gig_id, instance.seller_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_rating_aggregates(sender, instance, **kwargs):
+    if instance.is_active:
+        apply_rating_delta(instance.gig_id, instance.seller_id, -instance.rating, -1)
@@ -1,3 +1,96 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from apps.accounts.authentication import get_cached_user
+from apps.accounts.models import UserRoles
+from apps.marketplace.models import Categories, Services, Gigs
+from apps.orders.models import Order, OrderStatus
+from .models import Review
+
+User = get_user_model()
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        seller_role = UserRoles.objects.create(role_name="Seller")
+        buyer_role = UserRoles.objects.create(role_name="Buyer")
+        self.seller = User.objects.create(username='seller', email='seller@example.com', role=seller_role)
+        self.buyer = User.objects.create(username='buyer', email='buyer@example.com', role=buyer_role)
+        service = Services.objects.create(name='Logo', category=Categories.objects.create(name='Design'))
+        self.gig = Gigs.objects.create(
+            seller=self.seller, service=service, title='Logo design',
+            description='A logo', price=50, delivery_time=3
+        )
+        completed = OrderStatus.objects.create(name='Completed')
+        # bulk_create skips the new-order notification signal
+        self.orders = Order.objects.bulk_create([
+            Order(buyer=self.buyer, gig=self.gig, status=completed, requirements='r')
+            for _ in range(3)
+        ])
+
+    def review(self, order, rating):
+        return Review.objects.create(
+            order=order, gig=self.gig, reviewer=self.buyer, seller=self.seller, rating=rating
+        )
+
+    def assertAggregates(self, rating_sum, rating_count):
+        self.gig.refresh_from_db()
+        self.seller.refresh_from_db()
+        for obj in (self.gig, self.seller):
+            self.assertEqual((obj.rating_sum, obj.rating_count), (rating_sum, rating_count))
+
+    def test_creating_reviews_updates_aggregates(self):
+        self.review(self.orders[0], 5)
+        self.review(self.orders[1], 2)
+        self.assertAggregates(7, 2)
+        self.assertEqual(self.gig.average_rating, 3.5)
+        self.assertEqual(self.seller.reviews_count, 2)
+
+    def test_deactivating_and_reactivating_review(self):
+        review = self.review(self.orders[0], 4)
+        review.is_active = False
+        review.save()
+        self.assertAggregates(0, 0)
+        self.assertEqual(self.gig.average_rating, 0)
+
+        review.is_active = True
+        review.save()
+        self.assertAggregates(4, 1)
+
+    def test_editing_rating_and_deleting_review(self):
+        review = self.review(self.orders[0], 4)
+        review.rating = 2
+        review.save()
+        self.assertAggregates(2, 1)
+
+        review.delete()
+        self.assertAggregates(0, 0)
+
+    def test_review_refreshes_cached_seller(self):
+        cache.clear()
+        get_cached_user(self.seller.pk)
+        self.review(self.orders[0], 5)
+        self.assertEqual(get_cached_user(self.seller.pk).rating_count, 1)
+
+    def test_average_rating_does_not_query(self):
+        self.review(self.orders[0], 5)
+        gig = Gigs.objects.get(pk=self.gig.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(gig.average_rating, 5)
+            self.assertEqual(gig.reviews_count, 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        self.review(self.orders[0], 5)
+        self.review(self.orders[1], 3)
+        Gigs.objects.filter(pk=self.gig.pk).update(rating_sum=0, rating_count=9)
+        Review.objects.filter(order=self.orders[1]).update(is_active=False)
 
-# Create your tests here.
+        out = StringIO()
+        call_command('rebuild_rating_aggregates', stdout=out)
+        self.assertIn('1 gigs repaired', out.getvalue())
+        self.assertIn('1 sellers repaired', out.getvalue())
+        self.assertAggregates(5, 1)
@@ -1,6 +1,7 @@
 from django.shortcuts import render
 
 # Create your views here.
+from django.db import transaction
 from rest_framework import generics, permissions
 from rest_framework.exceptions import ValidationError
 from .models import Review
@@ -21,12 +22,14 @@ class CreateReviewView(generics.CreateAPIView):
         if hasattr(order, 'review'):
             raise ValidationError("This order has already been reviewed.")
 
-        serializer.save(
-            reviewer=self.request.user,
-            seller=order.gig.seller,  
-            gig=order.gig,
-            order=order
-        )
+        # The review and the denormalized gig/seller ratings commit together
+        with transaction.atomic():
+            serializer.save(
+                reviewer=self.request.user,
+                seller=order.gig.seller,  
+                gig=order.gig,
+                order=order
+            )
 
 class GigReviewListView(generics.ListAPIView):
     serializer_class = ReviewSerializer
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Django Rest Framework
     'rest_framework',
     'rest_framework_simplejwt',
@@ -109,6 +110,33 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'talent-planet',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Admin dashboard stats are recomputed at most once per TTL (seconds)
+DASHBOARD_STATS_TTL = 60
+
+# Top-rated gigs (apps.marketplace.ranking): Bayesian average with this many
+# virtual reviews at the marketplace mean; pages are cached for the TTL
+TOP_RATED_PRIOR_WEIGHT = 5
+TOP_RATED_MIN_SCORE = 3.5
+TOP_RATED_CACHE_TTL = 60 * 10
+
+# Text search configuration of the stored gig search vectors; 'simple'
+# doesn't stem, so English and Arabic listings are matched alike
+GIG_SEARCH_CONFIG = 'simple'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -158,7 +186,7 @@ AUTH_USER_MODEL  = 'accounts.User'
 # REST framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -174,10 +202,19 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,  # Invalidates old refresh tokens
 }
 
+# Log the JWT user cache hit rate every this many lookups (0 disables it)
+USER_CACHE_STATS_LOG_EVERY = 1000
+
 load_dotenv()
 LAHZA_PUBLIC_KEY =os.getenv('LAHZA_PUBLIC_KEY') 
 LAHZA_SECRET_KEY = os.getenv('LAHZA_SECRET_KEY')
 LAHZA_API_URL = os.getenv('LAHZA_API_URL')
+# apps.payment.lahza.LahzaClient: timeouts in seconds, retries for idempotent calls only
+LAHZA_CONNECT_TIMEOUT = 3.05
+LAHZA_READ_TIMEOUT = 10
+LAHZA_MAX_RETRIES = 2
+LAHZA_CIRCUIT_FAILURE_THRESHOLD = 5
+LAHZA_CIRCUIT_RESET_TIMEOUT = 30
 
 
 ASGI_APPLICATION = 'backend.asgi.application'
@@ -190,6 +227,15 @@ CHANNEL_LAYERS = {
         },
     },
 }
+# Notifications are published in batches after commit
+NOTIFICATION_BACKEND = 'apps.communications.notification.dispatcher.ChannelLayerBackend'
+NOTIFICATION_BATCH_SIZE = 100
+
+# Order fees (apps.payment.fees): Lahza takes its cut of the price, the
+# platform takes its rate of the rest. Overrides are keyed by category id.
+LAHZA_FEE_RATE = '0.025'
+PLATFORM_FEE_RATE = '0.075'
+PLATFORM_FEE_RATES_BY_CATEGORY = {}
 
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND')
 EMAIL_HOST = os.getenv('EMAIL_HOST')
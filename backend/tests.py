@@ -0,0 +1,274 @@
+"""
+Query-count and wall-time budgets for the REST API.
+
+Seeds a realistic dataset once, hits every read endpoint and fails when an
+endpoint issues more SQL queries (or takes longer) than its budget, so N+1
+regressions in serializers show up in CI. A per-endpoint table is printed
+at the end of the run.
+"""
+import random
+import re
+import sys
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+
+from apps.accounts.models import EmailVerificationCode, UserRoles
+from apps.marketplace.models import Categories, Services, Gigs
+from apps.marketplace.search import trigram_available, update_search_vectors
+from apps.orders.models import Order, OrderStatus
+from apps.payment.models import LahzaTransaction, WithdrawalRequest
+from apps.payment.tests import MarketplaceFixtureMixin
+from apps.reviews.models import Review
+from apps.communications.messages.models import Room, Message
+from apps.communications.notification.models import Notification
+
+User = get_user_model()
+
+DEFAULT_TIME_BUDGET = 1.0  # seconds
+
+# (label, url, user attribute on the test case or None, max queries)
+ENDPOINT_BUDGETS = [
+    ('users', '/api/auth/users/', 'admin', 12),
+    ('user detail', '/api/auth/users/{buyer.id}/', 'buyer', 2),
+    ('admin dashboard', '/api/auth/admin/dashboard-stats/', 'admin', 2),
+    ('public profile', '/api/auth/profile/{seller.id}/', None, 1),
+    ('seller earnings', '/api/auth/seller/earnings/', 'seller', 1),
+    ('categories', '/api/categories/', None, 2),
+    ('services', '/api/categories/{category.id}/services/', None, 2),
+    ('gig list', '/api/services/{service.id}/gigs/', None, 2),
+    ('gig list by rating', '/api/services/{service.id}/gigs/?sort=highest_rating', None, 2),
+    ('gig list by price', '/api/services/{service.id}/gigs/?sort=lowest_price', None, 2),
+    ('top rated gigs', '/api/gigs/top-rated/', None, 2),
+    ('gig search', '/api/gigs/search/?q=lorem', None, 1),
+    ('gig detail', '/api/gigs/{gig.id}/', None, 3),
+    ('my gigs', '/api/my-gigs/', 'seller', 2),
+    ('my gigs by service', '/api/my-gigs/service/{service.id}/', 'seller', 2),
+    ('admin gigs', '/api/admin/gigs/', 'admin', 2),
+    ('saved gigs', '/api/gigs/saved/', 'buyer', 2),
+    ('order statuses', '/api/orders/statuses/', None, 2),
+    ('all orders', '/api/orders/all/', 'admin', 2),
+    ('order detail', '/api/orders/{order.id}/', 'buyer', 1),
+    ('buyer active orders', '/api/orders/my-orders/active/', 'buyer', 2),
+    ('buyer completed orders', '/api/orders/my-orders/completed/', 'buyer', 2),
+    ('seller active orders', '/api/orders/seller-orders/active/', 'seller', 2),
+    ('seller completed orders', '/api/orders/seller-orders/completed/', 'seller', 2),
+    ('payment earnings', '/api/payment/my-earnings/', 'seller', 1),
+    ('admin payouts', '/api/payment/admin/payouts/', 'admin', 2),
+    ('admin withdrawals', '/api/payment/admin/withdrawals/', 'admin', 2),
+    ('rooms', '/api/messages/rooms/', 'buyer', 1),
+    ('room messages', '/api/messages/rooms/{room.id}/messages/', 'buyer', 2),
+    ('notifications', '/api/notifications/', 'buyer', 1),
+    ('unread notifications', '/api/notifications/unread-count/', 'buyer', 1),
+    ('gig reviews', '/api/reviews/gig/{gig.id}/', None, 12),
+    ('seller reviews', '/api/reviews/seller/{seller.id}/', None, 12),
+]
+
+
+class EndpointQueryBudgetTests(APITestCase):
+    results = []
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+
+        roles = {
+            name: UserRoles.objects.create(role_id=role_id, role_name=name)
+            for role_id, name in ((1, 'Admin'), (2, 'Buyer'), (3, 'Seller'))
+        }
+        statuses = [
+            OrderStatus.objects.create(id=status_id, name=name)
+            for status_id, name in (
+                (1, 'In Progress'), (2, 'Delivered'), (3, 'Completed'), (4, 'Cancelled'), (5, 'Revision'),
+            )
+        ]
+
+        cls.admin = User.objects.create(
+            username='admin', email='admin@example.com', role=roles['Admin'], is_staff=True
+        )
+        sellers = User.objects.bulk_create([
+            User(username=f'seller{i}', email=f'seller{i}@example.com', role=roles['Seller'], password='!')
+            for i in range(20)
+        ])
+        buyers = User.objects.bulk_create([
+            User(username=f'buyer{i}', email=f'buyer{i}@example.com', role=roles['Buyer'], password='!')
+            for i in range(40)
+        ])
+        cls.seller, cls.buyer = sellers[0], buyers[0]
+
+        categories = Categories.objects.bulk_create([Categories(name=f'Category {i}') for i in range(5)])
+        services = Services.objects.bulk_create([
+            Services(name=f'Service {i}', category=categories[i % 5]) for i in range(10)
+        ])
+        cls.category, cls.service = categories[0], services[0]
+
+        gigs = Gigs.objects.bulk_create([
+            Gigs(
+                seller=sellers[i % 20], service=services[i % 10],
+                title=f'Gig {i}', description='Lorem ipsum ' * 20,
+                price=rng.randint(5, 500), delivery_time=rng.randint(1, 14),
+            )
+            for i in range(300)
+        ])
+        cls.buyer.saved_gigs.add(*gigs[:30])
+
+        orders = Order.objects.bulk_create([
+            Order(
+                buyer=buyers[i % 40] if i % 3 else cls.buyer,
+                gig=gigs[i % 300] if i % 2 else gigs[(i * 10) % 300],
+                status=statuses[i % 5], requirements='Please deliver quickly',
+                is_paid=i % 2 == 0, platform_fee=3, seller_payout=40,
+            )
+            for i in range(400)
+        ])
+        cls.order = next(order for order in orders if order.buyer_id == cls.buyer.id)
+
+        Review.objects.bulk_create([
+            Review(
+                order=order, gig_id=order.gig_id, reviewer_id=order.buyer_id,
+                seller_id=order.gig.seller_id, rating=rng.randint(1, 5), comment='Great work',
+            )
+            for order in orders if order.status_id == 3
+        ])
+        # bulk_create skips the rating signals
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        call_command('refresh_gig_rankings', stdout=StringIO())
+        update_search_vectors(Gigs.objects.all())
+        cls.gig = next(order.gig for order in orders if order.status_id == 3)
+        LahzaTransaction.objects.bulk_create([
+            LahzaTransaction(
+                order=order, user_id=order.buyer_id, transaction_type='payment',
+                transaction_id=f'tx-{order.id}', amount=order.gig.price, status='success',
+            )
+            for order in orders if order.is_paid
+        ])
+        WithdrawalRequest.objects.bulk_create([
+            WithdrawalRequest(seller=seller, amount=25) for seller in sellers
+        ])
+
+        rooms = Room.objects.bulk_create(
+            [Room(user1=cls.buyer, user2=other) for other in buyers[1:] + sellers]
+            + [Room(user1=buyers[i], user2=sellers[i]) for i in range(1, 20)]
+        )
+        cls.room = rooms[0]
+        now = timezone.now()
+        messages = Message.objects.bulk_create([
+            Message(
+                room=room, sender_id=rng.choice([room.user1_id, room.user2_id]),
+                content=f'Message {i}', is_read=i % 4 == 0,
+            )
+            for room in rooms for i in range(15)
+        ])
+        for i, message in enumerate(messages):
+            message.timestamp = now - timedelta(minutes=len(messages) - i)
+        Message.objects.bulk_update(messages, ['timestamp'])
+
+        Notification.objects.bulk_create([
+            Notification(
+                user=buyers[i % 40], title=f'Notification {i}', body='Something happened',
+                notification_type='order',
+            )
+            for i in range(400)
+        ])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if cls.results:
+            sys.stdout.write('\n%-26s %8s %8s %10s\n' % ('endpoint', 'queries', 'budget', 'time (ms)'))
+            for label, queries, budget, elapsed in cls.results:
+                sys.stdout.write('%-26s %8d %8d %10.1f\n' % (label, queries, budget, elapsed * 1000))
+
+    def test_endpoint_budgets(self):
+        # Budgets are measured against cold caches, except the reference
+        # tables and the pg_trgm check which stay cached for the life of a process
+        cache.clear()
+        OrderStatus.objects.get_cached(name=OrderStatus.COMPLETED)
+        UserRoles.objects.get_cached(pk=1)
+        trigram_available()
+        type(self).results = []
+        for label, url, user_attr, max_queries in ENDPOINT_BUDGETS:
+            with self.subTest(endpoint=label):
+                user = getattr(self, user_attr) if user_attr else None
+                self.client.force_authenticate(user=user)
+                url = url.format(**{name: getattr(self, name) for name in (
+                    'buyer', 'seller', 'category', 'service', 'gig', 'order', 'room',
+                )})
+
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = self.client.get(url)
+                    elapsed = time.perf_counter() - started
+
+                self.results.append((label, len(ctx.captured_queries), max_queries, elapsed))
+                self.assertEqual(response.status_code, 200, url)
+                self.assertLessEqual(
+                    len(ctx.captured_queries), max_queries,
+                    f"{url} issued {len(ctx.captured_queries)} queries (budget {max_queries})",
+                )
+                self.assertLessEqual(elapsed, DEFAULT_TIME_BUDGET, f"{url} took {elapsed:.3f}s")
+
+
+UPDATE_SET_RE = re.compile(r'^UPDATE "(?P<table>\w+)" SET (?P<assignments>.*?)(?: WHERE |$)', re.S)
+
+
+@override_settings(NOTIFICATION_BACKEND='apps.communications.notification.dispatcher.LocalBackend')
+class TargetedWriteTests(MarketplaceFixtureMixin, APITestCase):
+    """Write endpoints must only UPDATE the columns they change."""
+
+    def setUp(self):
+        self.create_marketplace()
+        self.admin = User.objects.create(username='admin', email='admin@example.com', is_staff=True)
+        self.order_obj = self.order(self.gig, OrderStatus.COMPLETED, is_paid=True, seller_payout=90)
+
+    def updated_columns(self, method, url, user, data=None):
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300, getattr(response, 'data', None))
+        columns = {}
+        for query in queries.captured_queries:
+            match = UPDATE_SET_RE.match(query['sql'])
+            if match:
+                columns.setdefault(match['table'], set()).update(re.findall(r'"(\w+)" = ', match['assignments']))
+        return columns
+
+    def test_gig_toggle_and_soft_delete(self):
+        columns = self.updated_columns('patch', f'/api/admin/gigs/{self.gig.pk}/toggle-status/', self.admin)
+        self.assertEqual(columns, {'gigs': {'is_active'}})
+        self.assertFalse(Gigs.objects.get(pk=self.gig.pk).is_active)
+
+        columns = self.updated_columns('delete', f'/api/gigs/{self.other_gig.pk}/', self.seller)
+        self.assertEqual(columns, {'gigs': {'is_active'}})
+
+    def test_notification_mark_read(self):
+        notification = Notification.objects.create(user=self.buyer, title='t', body='b')
+        url = '/api/notifications/mark-read/'
+        columns = self.updated_columns('patch', url, self.buyer, {'notification_id': notification.pk})
+        self.assertEqual(columns, {'notification_notification': {'is_read'}})
+        self.assertTrue(Notification.objects.get(pk=notification.pk).is_read)
+
+    def test_order_cancel_and_payout_approval(self):
+        url = f'/api/payment/admin/payouts/{self.order_obj.pk}/approve/'
+        columns = self.updated_columns('patch', url, self.admin)
+        self.assertEqual(columns['orders'], {'payout_sent', 'updated_at'})
+        # Approving twice writes nothing
+        self.assertEqual(self.updated_columns('patch', url, self.admin), {})
+
+        columns = self.updated_columns('delete', f'/api/orders/{self.order_obj.pk}/', self.buyer)
+        self.assertEqual(columns['orders'], {'is_active', 'status_id', 'updated_at'})
+
+    def test_email_verification(self):
+        EmailVerificationCode.objects.create(email=self.buyer.email, code='123456')
+        data = {'email': self.buyer.email, 'code': '123456'}
+        columns = self.updated_columns('post', '/api/auth/confirm-verification/', None, data)
+        self.assertEqual(columns, {'users': {'is_verified', 'updated_at'}})